@@ -4,6 +4,7 @@ Streamlit GUI for Dining Hall Meal Optimizer
 
 import streamlit as st
 from dining_optimizer import DiningHallOptimizer
+from prefetch import PrefetchScheduler
 
 # Page config
 st.set_page_config(
@@ -21,10 +22,31 @@ Find the best high-protein items at Georgia Tech dining halls ranked by protein
 # Initialize optimizer (with caching)
 @st.cache_resource
 def get_optimizer():
-    return DiningHallOptimizer()
+    # Serve an expired week instantly (up to a day past expiry) and refresh it in the background
+    optimizer = DiningHallOptimizer(max_staleness=24 * 3600)
+    # Keep this week and next warm so Monday mornings aren't cold API fetches
+    PrefetchScheduler(optimizer).start()
+    return optimizer
 
 optimizer = get_optimizer()
 
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def ranked_items(halls, meal_type, versions):
+    # versions (each week's cache timestamp) is part of the key: a refetched or
+    # revalidated week changes it, so stale rankings are never served
+    return optimizer.top_items(list(halls), meal_type, top_n=10)
+
+
+def top_items(halls, meal_type):
+    """Top 10 items for the current week, cached per selection and menu version."""
+    versions = optimizer.cache_versions(halls, [meal_type])
+    if None in versions.values():
+        # Missing or expired week: let the optimizer fetch (or serve stale and refresh)
+        return optimizer.top_items(halls, meal_type, top_n=10)
+    return ranked_items(tuple(halls), meal_type, tuple(versions.items()))
+
+
 # Sidebar for inputs
 st.sidebar.header("Meal Preferences")
 
@@ -54,44 +76,18 @@ find_button = st.sidebar.button("🔍 Show Top Items", type="primary", use_conta
 # Main content area
 if find_button:
     with st.spinner("Fetching menu..."):
-        # Fetch menu data
-        all_items = []
-        for hall_id in selected_halls:
-            items = optimizer.fetch_menu(hall_id, meal_type, verbose=False)
-            all_items.extend(items)
+        # Unique items with ≥12g protein, ranked by efficiency (highest first); cache
+        # misses for all halls are fetched in parallel and the filter runs in the cache backend.
+        # Repeat views of a selection are served from memory until its menus change.
+        items_with_efficiency = top_items(selected_halls, meal_type)
 
-        if not all_items:
+        if not items_with_efficiency:
             st.error("❌ Could not fetch menu data. Please try again later.")
         else:
-            # Filter items with meaningful protein (min 12g) and valid calories
-            valid_items = [item for item in all_items
-                          if item['calories'] > 0 and item['protein'] >= 12]
-
-            # Remove duplicates by name + dining hall
-            seen = set()
-            unique_items = []
-            for item in valid_items:
-                key = (item['name'], item['dining_hall'])
-                if key not in seen:
-                    seen.add(key)
-                    unique_items.append(item)
-
-            # Create list with efficiency scores
-            items_with_efficiency = []
-            for item in unique_items:
-                protein_efficiency = item['protein'] / item['calories']
-                items_with_efficiency.append({
-                    **item,
-                    'protein_efficiency': protein_efficiency
-                })
-
-            # Sort by efficiency (highest first)
-            items_with_efficiency.sort(key=lambda x: -x['protein_efficiency'])
-
             # Display top 10
             st.success(f"✅ Top 10 items by protein efficiency!")
 
-            for idx, item in enumerate(items_with_efficiency[:10], 1):
+            for idx, item in enumerate(items_with_efficiency, 1):
                 with st.expander(
                     f"**#{idx}**: {item['name']} - {item['protein_efficiency']:.3f}g/cal",
                     expanded=(idx <= 5)
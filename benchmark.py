@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the cache, categorization, scoring, search and ranking paths.
+
+Every case runs on the cached weeks in .cache/ ("fixtures") and on synthetic
+menus of 1k, 10k and 100k items (see menu_generator). Results are written as JSON, and a run can be
+compared against a stored baseline to catch regressions:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json   # exit status 1 on regressions
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from dining_optimizer import DiningHallOptimizer, categorize
+from menu_generator import MenuGenerator, MenuProfile, nutrislice_payload
+from menu_table import MenuTable
+from parse_benchmark import buffered, streaming
+from solver_benchmark import load_fixtures
+
+SIZES = ['fixtures', '1k', '10k', '100k']
+SIZE_ITEMS = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+
+# (protein goal, calorie limit) for the combination searches
+SEARCH_SCENARIO = (30, 500)
+
+# Medians below this many seconds apart are treated as noise when comparing
+NOISE_FLOOR = 0.001
+
+
+# Each case prepares its inputs and returns the function to time
+
+def case_load_from_cache_disk(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    # No memory tier, so every load reads, decompresses and decodes the file
+    disk_optimizer = DiningHallOptimizer(cache_dir=workdir / 'disk', memory_cache_size=0)
+    cache_key = disk_optimizer._get_cache_key('west-village', 'lunch', datetime.now())
+    disk_optimizer._save_to_cache(cache_key, menu)
+    return lambda: disk_optimizer._load_from_cache(cache_key)
+
+
+def case_load_from_cache_memory(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    cache_key = optimizer._get_cache_key('west-village', 'lunch', datetime.now())
+    optimizer._save_to_cache(cache_key, menu)
+    return lambda: optimizer._load_from_cache(cache_key)
+
+
+def case_categorize_food(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    items = menu.to_records()
+
+    def run():
+        # Start from an empty memo so repeats measure the categorizer, not the cache
+        categorize.cache_clear()
+        return [optimizer.categorize_food(item) for item in items]
+    return run
+
+
+def case_calculate_meal_score(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    # One three-item meal per three menu items
+    items = menu.to_records()
+    meals = [items[start:start + 3] for start in range(0, len(items) - 2, 3)]
+    protein_goal, calorie_limit = SEARCH_SCENARIO
+    return lambda: [optimizer.calculate_meal_score(meal, protein_goal, calorie_limit) for meal in meals]
+
+
+def case_find_combinations(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    return lambda: optimizer.find_combinations(menu, *SEARCH_SCENARIO)
+
+
+def case_find_optimal_combinations(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    return lambda: optimizer.find_optimal_combinations(menu, *SEARCH_SCENARIO)
+
+
+def case_show_top_items(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    return lambda: optimizer.show_top_items(menu, 10)
+
+
+def case_parse_buffered(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    payload = json.dumps(nutrislice_payload(menu.to_records())).encode('utf-8')
+    return lambda: buffered(payload)
+
+
+def case_parse_streaming(optimizer: DiningHallOptimizer, menu: MenuTable, workdir: Path) -> Callable:
+    payload = json.dumps(nutrislice_payload(menu.to_records())).encode('utf-8')
+    return lambda: streaming(payload)
+
+
+CASES: Dict[str, Callable] = {
+    'load_from_cache_disk': case_load_from_cache_disk,
+    'load_from_cache_memory': case_load_from_cache_memory,
+    'categorize_food': case_categorize_food,
+    'calculate_meal_score': case_calculate_meal_score,
+    'find_combinations': case_find_combinations,
+    'find_optimal_combinations': case_find_optimal_combinations,
+    'show_top_items': case_show_top_items,
+    'parse_buffered': case_parse_buffered,
+    'parse_streaming': case_parse_streaming,
+}
+
+
+def time_case(run: Callable[[], Any], repeats: int, budget: float) -> Dict[str, Any]:
+    """
+    Time run up to repeats times (at least once), stopping early once budget seconds are spent.
+
+    Returns {'runs', 'best', 'median', 'mean'} in seconds.
+    """
+    timings = []
+    spent = 0.0
+    while len(timings) < repeats and (not timings or spent < budget):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        timings.append(time.perf_counter() - start)
+        spent += timings[-1]
+    return {'runs': len(timings), 'best': min(timings), 'median': statistics.median(timings),
+            'mean': statistics.fmean(timings)}
+
+
+def run_suite(cache_dir: Path, sizes: List[str], cases: List[str], repeats: int = 5,
+              budget: float = 5.0, verbose: bool = True) -> Dict[str, Any]:
+    """Run every case on every menu size and return the JSON-ready report."""
+    fixtures = load_fixtures(cache_dir)
+    profile = MenuProfile.from_cache(cache_dir)
+    results = {}
+    for size in sizes:
+        # Synthetic menus are fitted to the fixtures and seeded, so every run times the same items
+        menu = fixtures if size == 'fixtures' else MenuGenerator(profile, seed=0).menu(SIZE_ITEMS[size])
+        for name in cases:
+            with tempfile.TemporaryDirectory() as workdir:
+                with DiningHallOptimizer(cache_dir=Path(workdir) / 'cache') as optimizer:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        run = CASES[name](optimizer, menu, Path(workdir))
+                    result = {'case': name, 'size': size, 'items': len(menu), **time_case(run, repeats, budget)}
+            results[f"{name}/{size}"] = result
+            if verbose:
+                print(f"{name:<26} {size:>8} {len(menu):>7} items  "
+                      f"median {result['median'] * 1000:>9.2f}ms  best {result['best'] * 1000:>9.2f}ms  "
+                      f"({result['runs']} runs)")
+    return {'meta': run_metadata(), 'results': results}
+
+
+def run_metadata() -> Dict[str, Optional[str]]:
+    """Where and on what code a report was produced."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'created': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform()}
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = 0.2) -> List[Dict]:
+    """
+    Compare median timings of the cases present in both reports.
+
+    Returns one row per shared case with 'change' (current / baseline - 1) and
+    'regression' (slower by more than threshold and by more than NOISE_FLOOR).
+    """
+    rows = []
+    for key, result in report['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            continue
+        change = result['median'] / previous['median'] - 1 if previous['median'] > 0 else 0.0
+        rows.append({'key': key, 'median': result['median'], 'baseline': previous['median'], 'change': change,
+                     'regression': change > threshold and result['median'] - previous['median'] > NOISE_FLOOR})
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Render compare() rows as a table."""
+    lines = [f"{'case':<36} {'baseline':>11} {'current':>11} {'change':>8}"]
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        lines.append(f"{row['key']:<36} {row['baseline'] * 1000:>9.2f}ms {row['median'] * 1000:>9.2f}ms "
+                     f"{row['change'] * 100:>+7.1f}%{flag}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cache, categorization, scoring, search and ranking.")
+    parser.add_argument("--cache-dir", type=Path, default=Path(".cache"), help="Directory with fixture weeks")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=SIZES, help="Menu sizes to run")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Cases to run")
+    parser.add_argument("--repeats", type=int, default=5, help="Maximum runs per case (default: 5)")
+    parser.add_argument("--budget", type=float, default=5.0,
+                        help="Seconds after which a case stops repeating (default: 5)")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare against a stored JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Slowdown (fraction of the baseline median) reported as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.cache_dir, args.sizes, args.cases, args.repeats, args.budget)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        rows = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        print("\n" + format_comparison(rows))
+        regressions = sum(row['regression'] for row in rows)
+        if regressions:
+            print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Vectorized candidate generation for meal combinations.
+
+Combinations are represented as rows of item indexes (into a MenuTable),
+padded with -1 to a fixed width so whole candidate sets can be filtered,
+deduplicated and ranked as NumPy arrays.
+"""
+
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+
+# Upper bound on broadcast cells evaluated at once (bounds peak memory)
+MAX_CELLS = 1 << 22
+
+
+def iter_template(pools: Sequence[np.ndarray], protein: np.ndarray, calories: np.ndarray,
+                  names: np.ndarray, protein_goal: float, calorie_limit: float,
+                  distinct: Sequence[Tuple[int, int]] = (),
+                  increasing: Sequence[Tuple[int, int]] = ()) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Evaluate every combination taking one item from each pool, chunk by chunk.
+
+    Args:
+        pools: One index array per slot of the template
+        protein, calories: Per-item columns the pool indexes point into
+        names: Per-item name codes; equal codes mean equal names
+        protein_goal: Minimum total protein
+        calorie_limit: Maximum total calories
+        distinct: Slot pairs whose items must have different names
+        increasing: Slot pairs (a, b) where b's position in its pool must be
+                    greater than a's (for pairs drawn from the same ranked pool)
+
+    Yields (combos, total_protein, total_calories) for the survivors of each
+    chunk; concatenated, they are in the order nested for-loops over the pools
+    would produce them.
+    """
+    if any(len(pool) == 0 for pool in pools):
+        return
+
+    cells_per_head = int(np.prod([len(pool) for pool in pools[1:]], dtype=np.int64))
+    chunk = max(1, MAX_CELLS // max(cells_per_head, 1))
+
+    for start in range(0, len(pools[0]), chunk):
+        positions = np.ix_(np.arange(start, min(start + chunk, len(pools[0]))),
+                           *[np.arange(len(pool)) for pool in pools[1:]])
+        items = [pool[position] for pool, position in zip(pools, positions)]
+
+        total_protein = protein[items[0]]
+        total_calories = calories[items[0]]
+        for slot in items[1:]:
+            total_protein = total_protein + protein[slot]
+            total_calories = total_calories + calories[slot]
+
+        mask = (total_protein >= protein_goal) & (total_calories <= calorie_limit)
+        for a, b in distinct:
+            mask = mask & (names[items[a]] != names[items[b]])
+        for a, b in increasing:
+            mask = mask & (positions[b] > positions[a])
+
+        hits = np.nonzero(mask)
+        yield (np.stack([np.broadcast_to(slot, mask.shape)[hits] for slot in items], axis=1),
+               np.broadcast_to(total_protein, mask.shape)[hits],
+               np.broadcast_to(total_calories, mask.shape)[hits])
+
+
+def pad_combos(combos: np.ndarray, width: int = 3) -> np.ndarray:
+    """Pad a block of combos with -1 columns up to width."""
+    return np.hstack([combos, np.full((len(combos), width - combos.shape[1]), -1, dtype=combos.dtype)])
+
+
+class UniqueNameSets:
+    """
+    Streaming first-occurrence filter for combos keyed by their multiset of item names.
+
+    Each name multiset is packed into one int64, and the keys seen so far are
+    kept as a sorted array (8 bytes per distinct meal) rather than a set of
+    tuples.
+    """
+
+    def __init__(self, names: np.ndarray):
+        self.names = names
+        # Codes are shifted by 2 so padding (0) sorts before missing names (1)
+        self.base = int(names.max()) + 3 if len(names) else 2
+        self._seen = np.empty(0, dtype=np.int64)
+
+    def first_seen(self, combos: np.ndarray) -> np.ndarray:
+        """Sorted indexes of combos whose name multiset has not been seen before."""
+        if not len(combos):
+            return np.arange(0)
+        keys = np.where(combos >= 0, self.names[np.maximum(combos, 0)].astype(np.int64) + 2, 0)
+        keys.sort(axis=1)
+
+        # Pack each sorted row into one integer so uniqueness is a flat 1-D sort
+        packed = np.zeros(len(keys), dtype=np.int64)
+        for column in keys.T:
+            packed = packed * self.base + column
+        unique, first = np.unique(packed, return_index=True)
+
+        new = ~np.isin(unique, self._seen, assume_unique=True)
+        self._seen = np.union1d(self._seen, unique[new])
+        return np.sort(first[new])
@@ -55,7 +55,7 @@ if proteins:
 # Check raw API data for first item
 print("\n\nChecking raw API data...")
 import requests
-url = "https://techdining.api.nutrislice.com/menu/api/weeks/school/west-village/menu-type/lunch/2026/02/11/"
+url = f"{optimizer.base_url}/west-village/menu-type/lunch/2026/02/11/"
 response = requests.get(url)
 data = response.json()
 
@@ -5,161 +5,764 @@ Helps you find meals that meet protein goals while staying under calorie limits.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
-import json
+from typing import List, Dict, Tuple, Optional, Union
+import numpy as np
+import argparse
 import sys
 import io
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
 
+from menu_cache import (CacheSerializer, FileLock, JsonSerializer, MemoryCache, SingleFlight, atomic_write_bytes,
+                        cache_files, get_serializer, iter_cache_entries)
+from combo_search import UniqueNameSets, iter_template, pad_combos
+from instrumentation import span, traced, traced_iter, tracer
+from meal_solver import solve_top_k
+from menu_store import SqliteMenuStore
+from menu_table import MenuTable
+from nutrislice import extract_menu_items, iter_menu_items
+from prefetch import PrefetchScheduler, format_report
+from profiling import profile_call, run_scenario, stub_process, write_collapsed
+from ranking import TopK, top_k_indices
+
 # Fix Windows console encoding for emojis
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 
+DEFAULT_BASE_URL = "https://techdining.api.nutrislice.com/menu/api/weeks/school"
+
+# Keywords for each category
+PROTEIN_KEYWORDS = [
+    'chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'turkey', 'duck',
+    'tofu', 'tempeh', 'seitan', 'egg', 'shrimp', 'steak', 'patty', 'sausage',
+    'bacon', 'ham', 'lamb', 'tilapia', 'cod', 'halibut', 'edamame', 'beans'
+]
+
+CARB_KEYWORDS = [
+    'rice', 'pasta', 'bread', 'potato', 'fries', 'noodle', 'quinoa', 'couscous',
+    'tortilla', 'bun', 'roll', 'bagel', 'cereal', 'oat', 'waffle', 'pancake',
+    'muffin', 'biscuit', 'mac', 'macaroni', 'spaghetti', 'penne', 'linguine'
+]
+
+VEGETABLE_KEYWORDS = [
+    'broccoli', 'salad', 'lettuce', 'spinach', 'kale', 'carrot', 'broccolini',
+    'tomato', 'cucumber', 'pepper', 'green beans', 'corn', 'peas', 'mushroom',
+    'vegetable', 'greens', 'cabbage', 'cauliflower', 'asparagus', 'zucchini',
+    'squash', 'brussels', 'bok choy', 'celery', 'onion', 'eggplant'
+]
+
+FRUIT_KEYWORDS = [
+    'apple', 'banana', 'orange', 'berry', 'strawberry', 'blueberry', 'melon',
+    'grape', 'pineapple', 'mango', 'peach', 'pear', 'fruit', 'watermelon'
+]
+
+
+def _compile_category_pattern(keyword_groups: List[Tuple[str, List[str]]]) -> re.Pattern:
+    """
+    Compile all category keywords into one regex.
+
+    Each category is a lookahead alternative, tried in priority order, that
+    succeeds if any of its keywords appears anywhere in the name; the matching
+    category is the name of the group that matched (match.lastgroup).
+    """
+    alternatives = []
+    for category, keywords in keyword_groups:
+        words = '|'.join(re.escape(word) for word in sorted(keywords, key=len, reverse=True))
+        alternatives.append(f"(?=.*?(?P<{category}>{words}))")
+    return re.compile('|'.join(alternatives), re.DOTALL)
+
+
+# Protein is checked first as it's most important
+CATEGORY_PATTERN = _compile_category_pattern([
+    ('protein', PROTEIN_KEYWORDS),
+    ('vegetable', VEGETABLE_KEYWORDS),
+    ('fruit', FRUIT_KEYWORDS),
+    ('carb', CARB_KEYWORDS),
+])
+
+
+@lru_cache(maxsize=65536)
+def categorize(name: str, protein: float, carbs: float, calories: float) -> str:
+    """
+    Category of one food: 'protein', 'vegetable', 'fruit', 'carb' or 'other'.
+
+    Memoized, as the same foods come back across halls and days.
+
+    Args:
+        name: Food name, matched against the category keywords
+        protein: Grams of protein
+        carbs: Grams of carbohydrates
+        calories: Calories
+    """
+    match = CATEGORY_PATTERN.match(name.lower())
+    if match:
+        return match.lastgroup
+
+    # Use nutrition to help classify ambiguous items
+    if protein >= 15:  # High protein content
+        return 'protein'
+    elif carbs >= 25 and protein < 8:  # High carb, low protein
+        return 'carb'
+    elif calories < 50 and carbs < 15:  # Low calorie, likely veggie
+        return 'vegetable'
+
+    return 'other'
+
+
+# Errors that make a cache entry unreadable (treated as a miss)
+CACHE_READ_ERRORS = (OSError, KeyError, ValueError, sqlite3.Error)
+
+# Cache entry field, response header and conditional request header for each upstream validator
+VALIDATOR_HEADERS = [
+    ('etag', 'ETag', 'If-None-Match'),
+    ('last_modified', 'Last-Modified', 'If-Modified-Since'),
+]
+
+
 class DiningHallOptimizer:
-    def __init__(self, cache_dir: str = ".cache"):
-        self.base_url = "https://techdining.api.nutrislice.com/menu/api/weeks/school"
+    def __init__(self, cache_dir: str = ".cache", session: Optional[requests.Session] = None,
+                 connect_timeout: float = 3.05, read_timeout: float = 15.0,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 max_connections_per_host: int = 8,
+                 memory_cache_size: int = 32, memory_cache_ttl: float = 3600,
+                 cache_format: Union[str, CacheSerializer] = "binary",
+                 stream_json: bool = False, max_staleness: float = 0, cache_backend: str = "files",
+                 base_url: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Directory for cached weekly menus
+            session: HTTP session to use for API requests (e.g. one pointed at a
+                     local stand-in server); a pooled keep-alive session is built if omitted
+            connect_timeout: Seconds to wait for a connection to the API
+            read_timeout: Seconds to wait for the API to send data
+            max_retries: Retries for connection errors and 429/5xx responses
+            backoff_factor: Base delay for exponential backoff between retries
+            max_connections_per_host: Size of the keep-alive connection pool per host
+            memory_cache_size: Number of parsed weekly menus kept in memory
+            memory_cache_ttl: Seconds a parsed menu is served from memory before rereading disk
+            cache_format: On-disk format, 'binary' (compact columnar) or 'json', or a
+                          CacheSerializer instance; legacy JSON files are copied into it on read
+            stream_json: Parse API responses incrementally from the byte stream
+                         instead of buffering and parsing the whole week at once;
+                         cuts peak memory on large weeks about 4x but parses no
+                         faster than response.json() (see parse_benchmark.py)
+            max_staleness: Seconds past expiry a cached week may still be served
+                           while it is refreshed in a background thread
+                           (stale-while-revalidate); 0 always refetches synchronously
+            cache_backend: 'files' (one cache_format file per week) or 'sqlite' (every
+                           week in cache_dir/menus.sqlite3, filtered with indexed queries)
+            base_url: Weekly menu API root, e.g. a local stub_server; defaults to
+                      $NUTRISLICE_BASE_URL, then the Georgia Tech Nutrislice API
+        """
+        self.base_url = (base_url or os.environ.get("NUTRISLICE_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
         self.dining_halls = {
             "west-village": "West Village",
             "north-ave-dining-hall": "North Ave Dining Hall"
         }
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.cache_ttl = timedelta(days=7)
+        self.cache_serializer = get_serializer(cache_format)
+        if cache_backend == "sqlite":
+            self.menu_store = SqliteMenuStore(self.cache_dir / "menus.sqlite3")
+        elif cache_backend == "files":
+            self.menu_store = None
+        else:
+            raise ValueError(f"Unknown cache backend '{cache_backend}' (expected 'files' or 'sqlite')")
+        self.memory_cache = MemoryCache(max_entries=memory_cache_size, ttl_seconds=memory_cache_ttl)
+        # Timestamp of the entry each memory-tier menu was loaded from
+        self._memory_timestamps: Dict[str, str] = {}
+        self.max_staleness = timedelta(seconds=max_staleness)
+        # Started by the first background refresh, so only with max_staleness > 0
+        self._refresh_pool: Optional[ThreadPoolExecutor] = None
+        self._refreshing: Dict[str, Future] = {}
+        self._refresh_lock = threading.Lock()
+
+        self.timeout = (connect_timeout, read_timeout)
+        # One fetch per cache key at a time: shared by threads here, serialized across processes
+        self._fetch_flights = SingleFlight()
+        self._lock_timeout = (connect_timeout + read_timeout) * (max_retries + 1)
+        self.stream_json = stream_json
+        if session is None:
+            session = self._create_session(max_retries, backoff_factor, max_connections_per_host)
+        self.session = session
+
+    def _create_session(self, max_retries: int, backoff_factor: float,
+                        max_connections_per_host: int) -> requests.Session:
+        """Build a keep-alive HTTP session with bounded, jittered retries."""
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+        )
+        # pool_block caps concurrent connections per host instead of opening extras
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=len(self.dining_halls),
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     def clear_cache(self):
         """Clear all cached menu data."""
-        for cache_file in self.cache_dir.glob("*.json"):
+        for cache_file in self._cache_files():
             cache_file.unlink()
+        # Temp files left behind by writes interrupted before their rename
+        for temp_file in self.cache_dir.glob(".*.tmp"):
+            temp_file.unlink(missing_ok=True)
+        if self.menu_store is not None:
+            self.menu_store.clear()
+        self.memory_cache.clear()
+        self._memory_timestamps.clear()
         print("Cache cleared!")
 
+    def cache_stats(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters for the in-memory cache tier."""
+        return self.memory_cache.stats()
+
     def get_cache_info(self):
         """Get information about cached data."""
-        cache_files = list(self.cache_dir.glob("*.json"))
-        if not cache_files:
+        if self.menu_store is not None:
+            entries = self.menu_store.entries()
+            if not entries:
+                return "No cached data"
+            return "\n".join(f"{cache_key}: {(datetime.now() - datetime.fromisoformat(timestamp)).days} days old"
+                             for cache_key, timestamp in entries)
+
+        if not self._cache_files():
             return "No cached data"
 
         info = []
-        for cache_file in cache_files:
+        for cache_file, data in iter_cache_entries(self.cache_dir, skip_invalid=True):
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    timestamp = datetime.fromisoformat(data['timestamp'])
-                    age_days = (datetime.now() - timestamp).days
-                    info.append(f"{cache_file.stem}: {age_days} days old")
+                timestamp = datetime.fromisoformat(data['timestamp'])
+                age_days = (datetime.now() - timestamp).days
+                info.append(f"{cache_file.stem}: {age_days} days old")
             except:
                 pass
         return "\n".join(info) if info else "No valid cache"
 
+    def _cache_files(self) -> List[Path]:
+        """List cache files in any supported format."""
+        return cache_files(self.cache_dir)
+
+    def _get_week_start(self, date: datetime) -> str:
+        """Return the Monday of the week containing date as YYYY-MM-DD."""
+        monday = date - timedelta(days=date.weekday())
+        return monday.strftime('%Y-%m-%d')
+
     def _get_cache_key(self, dining_hall: str, meal_type: str, date: datetime) -> str:
         """Generate a cache key for a specific menu request."""
         # Use Monday of the week as the key since API returns weekly data
-        monday = date - timedelta(days=date.weekday())
-        return f"{dining_hall}_{meal_type}_{monday.strftime('%Y-%m-%d')}.json"
+        return f"{dining_hall}_{meal_type}_{self._get_week_start(date)}"
+
+    def _cache_path(self, cache_key: str) -> Path:
+        """Path of the cache file for a key in the configured format."""
+        return self.cache_dir / f"{cache_key}{self.cache_serializer.suffix}"
+
+    def _legacy_path(self, cache_key: str) -> Optional[Path]:
+        """Pre-binary JSON cache file for a key, unless that is the live cache file."""
+        legacy_file = self.cache_dir / f"{cache_key}{JsonSerializer.suffix}"
+        if self.menu_store is None and legacy_file == self._cache_path(cache_key):
+            return None
+        return legacy_file
+
+    def _read_cache_file(self, cache_key: str) -> Optional[Dict]:
+        """Read a raw cache entry from disk, migrating a legacy JSON file if needed."""
+        if self.menu_store is not None:
+            cached_data = self.menu_store.load(cache_key)
+            if cached_data is not None:
+                return cached_data
+        else:
+            cache_file = self._cache_path(cache_key)
+            if cache_file.exists():
+                return self.cache_serializer.loads(cache_file.read_bytes())
+
+        legacy_file = self._legacy_path(cache_key)
+        if legacy_file is not None and legacy_file.exists():
+            cached_data = JsonSerializer().loads(legacy_file.read_bytes())
+            cached_data['menu_items'] = self._with_categories(cached_data['menu_items'])
+            cached_data['days'] = cached_data['menu_items'].runs('date')
+            # Copy into the configured format, keeping the original timestamp. The
+            # legacy file stays (it may be a tracked fixture) and is never read again
+            # while the copy exists. If a fetch holds the key's lock, leave it: its new
+            # entry supersedes the file.
+            lock = self._key_lock(cache_key)
+            if lock.acquire(timeout=0):
+                try:
+                    if self._cache_version(cache_key) is None:
+                        self._write_entry(cache_key, cached_data)
+                finally:
+                    lock.release()
+            return cached_data
+        return None
+
+    def _write_entry(self, cache_key: str, cache_data: Dict):
+        """Store a raw cache entry in the configured backend."""
+        if self.menu_store is not None:
+            # One transaction per week, so readers never see a partial one
+            self.menu_store.save(cache_key, cache_data)
+        else:
+            # Atomic, so readers never need the lock; writers hold it (see _fetch_exclusive)
+            atomic_write_bytes(self._cache_path(cache_key), self.cache_serializer.dumps(cache_data))
 
-    def _load_from_cache(self, cache_key: str) -> Optional[List[Dict]]:
+    def _load_from_cache(self, cache_key: str) -> Optional[MenuTable]:
         """Load menu data from cache if it exists and is fresh."""
-        cache_file = self.cache_dir / cache_key
+        # Serve already-parsed menus from memory first
+        menu_items = self.memory_cache.get(cache_key)
+        if menu_items is not None:
+            return menu_items
+
+        try:
+            with span('cache.read', key=cache_key):
+                cached_data = self._read_cache_file(cache_key)
+            if cached_data is not None:
+                # Check if cache is still valid (within 7 days)
+                cache_time = datetime.fromisoformat(cached_data['timestamp'])
+                remaining = self.cache_ttl - (datetime.now() - cache_time)
+                if remaining > timedelta(0):
+                    menu_items = self._entry_table(cached_data)
+                    self.memory_cache.put(cache_key, menu_items, remaining.total_seconds())
+                    self._memory_timestamps[cache_key] = cached_data['timestamp']
+                    return menu_items
+        except CACHE_READ_ERRORS:
+            # ValueError covers JSONDecodeError, corrupt binary files and bad timestamps
+            pass
+        return None
+
+    def _entry_table(self, cached_data: Dict) -> MenuTable:
+        """Menu table of a cache entry, categorized and with its stored day index attached."""
+        menu_items = self._with_categories(cached_data['menu_items'])
+        if 'days' in cached_data:
+            menu_items.set_runs('date', cached_data['days'])
+        return menu_items
+
+    def _read_cache_metadata(self, cache_key: str) -> Optional[Dict]:
+        """A cache entry's fields other than its items (timestamp, validators, day index)."""
+        if self.menu_store is not None:
+            return self.menu_store.load_metadata(cache_key)
+        cache_file = self._cache_path(cache_key)
         if cache_file.exists():
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                    # Check if cache is still valid (within 7 days)
-                    cache_time = datetime.fromisoformat(cached_data['timestamp'])
-                    if datetime.now() - cache_time < timedelta(days=7):
-                        return cached_data['menu_items']
-            except (json.JSONDecodeError, KeyError, ValueError):
-                pass
+            return self.cache_serializer.loads_metadata(cache_file.read_bytes())
         return None
 
-    def _save_to_cache(self, cache_key: str, menu_items: List[Dict]):
-        """Save menu data to cache."""
-        cache_file = self.cache_dir / cache_key
+    def _load_stale_entry(self, cache_key: str) -> Optional[Dict]:
+        """Read a cache entry regardless of age (for conditional revalidation)."""
+        try:
+            return self._read_cache_file(cache_key)
+        except CACHE_READ_ERRORS:
+            return None
+
+    def _save_to_cache(self, cache_key: str, menu_items: MenuTable, validators: Optional[Dict[str, str]] = None):
+        """
+        Save menu data to cache.
+
+        Args:
+            cache_key: Cache key from _get_cache_key
+            menu_items: Menu table to store
+            validators: Upstream 'etag' / 'last_modified' values used to revalidate
+                        the entry with a conditional GET once it expires
+        """
         cache_data = {
             'timestamp': datetime.now().isoformat(),
             'menu_items': menu_items
         }
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2)
+        cache_data.update(validators or {})
+        # Per-day row ranges, so single days and the list of days never scan the week
+        cache_data['days'] = menu_items.runs('date')
+        with span('cache.write', key=cache_key):
+            self._write_entry(cache_key, cache_data)
+        self.memory_cache.put(cache_key, menu_items, self.cache_ttl.total_seconds())
+        self._memory_timestamps[cache_key] = cache_data['timestamp']
+
+    @traced('cache.lookup')
+    def _load_or_refresh(self, dining_hall: str, meal_type: str, date: datetime,
+                         cache_key: str) -> Tuple[Optional[MenuTable], bool]:
+        """
+        Load a cached menu, serving an expired one while it is refreshed in the background.
 
-    def fetch_menu(self, dining_hall: str, meal_type: str, date: datetime = None, verbose: bool = True) -> List[Dict]:
-        """Fetch menu items from a dining hall for a specific meal (with caching)."""
+        Returns (menu_items, stale). menu_items is None when there is no usable
+        entry (missing, or expired for longer than max_staleness) and the caller
+        has to fetch synchronously.
+        """
+        menu_items = self._load_from_cache(cache_key)
+        if menu_items is not None or self.max_staleness <= timedelta(0):
+            return menu_items, False
+
+        stale = self._load_stale_entry(cache_key)
+        if stale is None:
+            return None, False
+        try:
+            age = datetime.now() - datetime.fromisoformat(stale['timestamp'])
+        except (KeyError, ValueError):
+            return None, False
+        if age >= self.cache_ttl + self.max_staleness:
+            return None, False
+
+        self._refresh_in_background(dining_hall, meal_type, date, cache_key)
+        return self._entry_table(stale), True
+
+    def _refresh_in_background(self, dining_hall: str, meal_type: str, date: datetime, cache_key: str):
+        """Refetch a week on the refresh pool unless a refresh for it is already running."""
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            if self._refresh_pool is None:
+                self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='menu-refresh')
+            future = self._refresh_pool.submit(self._fetch_from_api, dining_hall, meal_type, date, cache_key)
+            self._refreshing[cache_key] = future
+        future.add_done_callback(lambda _: self._finish_refresh(cache_key))
+
+    def _finish_refresh(self, cache_key: str):
+        with self._refresh_lock:
+            self._refreshing.pop(cache_key, None)
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> bool:
+        """Block until in-flight background refreshes finish; False if timeout ran out first."""
+        with self._refresh_lock:
+            pending = list(self._refreshing.values())
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def close(self):
+        """Finish in-flight background refreshes and stop the refresh threads."""
+        self.wait_for_refreshes()
+        with self._refresh_lock:
+            pool, self._refresh_pool = self._refresh_pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self) -> 'DiningHallOptimizer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @traced('fetch_menu')
+    def fetch_menu(self, dining_hall: str, meal_type: str, date: datetime = None, verbose: bool = True,
+                   single_day: bool = False) -> MenuTable:
+        """
+        Fetch menu items from a dining hall for a specific meal (with caching).
+
+        The whole week containing date is fetched and cached; with single_day
+        only the items served on date are returned, located through the
+        week's day index (or an indexed query with the SQLite backend).
+        """
         if date is None:
             date = datetime.now()
+        day = date.strftime('%Y-%m-%d')
 
         # Check cache first
         cache_key = self._get_cache_key(dining_hall, meal_type, date)
-        cached_data = self._load_from_cache(cache_key)
+        if single_day and self.menu_store is not None:
+            # Slice the week if it is already in memory, otherwise read just this day
+            menu_items = self.memory_cache.get(cache_key)
+            if menu_items is None:
+                return self.query_items([dining_hall], [meal_type], [date], day=day)
+            return menu_items.where_equals('date', day)
+
+        cached_data, stale = self._load_or_refresh(dining_hall, meal_type, date, cache_key)
         if cached_data is not None:
             if verbose:
-                print(f"    ✓ Loaded from cache (week of {(date - timedelta(days=date.weekday())).strftime('%Y-%m-%d')})")
-            return cached_data
+                note = ", refreshing in background" if stale else ""
+                print(f"    ✓ Loaded from cache (week of {self._get_week_start(date)}{note})")
+        else:
+            # Cache miss - fetch from API
+            if verbose:
+                print(f"    ↓ Fetching from API...")
+            cached_data = self._fetch_from_api(dining_hall, meal_type, date, cache_key)
+        return cached_data.where_equals('date', day) if single_day else cached_data
+
+    def refresh_menu(self, dining_hall: str, meal_type: str, date: datetime = None) -> MenuTable:
+        """Fetch a week from the API even if it is cached (conditionally, when validators are stored)."""
+        if date is None:
+            date = datetime.now()
+        return self._fetch_from_api(dining_hall, meal_type, date, self._get_cache_key(dining_hall, meal_type, date))
+
+    def cached_until(self, dining_hall: str, meal_type: str, date: datetime = None) -> Optional[datetime]:
+        """Expiry time of the cached week containing date, or None if that week is not cached."""
+        if date is None:
+            date = datetime.now()
+        cached_data = self._load_stale_entry(self._get_cache_key(dining_hall, meal_type, date))
+        try:
+            return datetime.fromisoformat(cached_data['timestamp']) + self.cache_ttl
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def cache_versions(self, dining_halls: List[str], meal_types: List[str],
+                       dates: Optional[List[datetime]] = None) -> Dict[Tuple[str, str, str], Optional[str]]:
+        """
+        Timestamp of each fresh cached week, keyed like fetch_menus; None if missing or expired.
+
+        A week's timestamp changes whenever it is refetched or revalidated, so
+        results derived from these menus can be cached under these versions.
+        Weeks held by the memory tier are answered without touching disk.
+        """
+        if dates is None:
+            dates = [datetime.now()]
+
+        versions = {}
+        for dining_hall in dining_halls:
+            for meal_type in meal_types:
+                for date in dates:
+                    key = (dining_hall, meal_type, self._get_week_start(date))
+                    if key in versions:
+                        continue
+                    cache_key = self._get_cache_key(dining_hall, meal_type, date)
+                    timestamp = self._memory_timestamps.get(cache_key) if cache_key in self.memory_cache else None
+                    if timestamp is None:
+                        try:
+                            metadata = self._read_cache_metadata(cache_key)
+                            if (metadata is not None and datetime.now() -
+                                    datetime.fromisoformat(metadata['timestamp']) < self.cache_ttl):
+                                timestamp = metadata['timestamp']
+                        except CACHE_READ_ERRORS:
+                            pass
+                    versions[key] = timestamp
+        return versions
+
+    @traced('fetch_menus')
+    def fetch_menus(self, dining_halls: List[str], meal_types: List[str],
+                    dates: Optional[List[datetime]] = None, verbose: bool = False,
+                    max_workers: int = 8) -> Dict[Tuple[str, str, str], MenuTable]:
+        """
+        Fetch several menus at once, issuing all cache misses in parallel.
+
+        Args:
+            dining_halls: Dining hall ids to fetch
+            meal_types: Meal types to fetch for every hall
+            dates: Dates to fetch (defaults to today); dates in the same week share one request
+            verbose: Print how many menus had to be fetched from the API
+            max_workers: Maximum number of concurrent API requests
+
+        Returns a dict keyed by (dining_hall, meal_type, week) where week is the
+        Monday of the requested week as YYYY-MM-DD, in request order.
+        """
+        if dates is None:
+            dates = [datetime.now()]
+
+        keys = []
+        results = {}
+        misses = {}
+        for dining_hall in dining_halls:
+            for meal_type in meal_types:
+                for date in dates:
+                    key = (dining_hall, meal_type, self._get_week_start(date))
+                    if key in results or key in misses:
+                        continue
+                    keys.append(key)
+
+                    cache_key = self._get_cache_key(dining_hall, meal_type, date)
+                    cached_data, _ = self._load_or_refresh(dining_hall, meal_type, date, cache_key)
+                    if cached_data is not None:
+                        results[key] = cached_data
+                    else:
+                        misses[key] = (dining_hall, meal_type, date, cache_key)
+
+        if misses:
+            if verbose:
+                print(f"    ↓ Fetching {len(misses)} menu(s) from API...")
+            # One worker per miss so N cold menus cost roughly one round-trip
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as pool:
+                futures = {key: pool.submit(self._fetch_from_api, *args)
+                           for key, args in misses.items()}
+                for key, future in futures.items():
+                    results[key] = future.result()
+        elif verbose:
+            print(f"    ✓ Loaded {len(results)} menu(s) from cache")
+
+        return {key: results[key] for key in keys}
+
+    @traced('query_items')
+    def query_items(self, dining_halls: List[str], meal_types: List[str],
+                    dates: Optional[List[datetime]] = None, day: Optional[str] = None,
+                    min_protein: Optional[float] = None, max_calories: Optional[float] = None,
+                    has_calories: bool = False) -> MenuTable:
+        """
+        Items from the given weeks that pass the filters, fetching uncached weeks first.
+
+        With the SQLite backend the filters run as indexed queries and only
+        matching rows are read; with cache files the weeks are loaded and masked.
 
-        # Cache miss - fetch from API
-        if verbose:
-            print(f"    ↓ Fetching from API...")
+        Args:
+            dining_halls, meal_types, dates: Weeks to search, as for fetch_menus
+            day: Only items served on this date (YYYY-MM-DD)
+            min_protein: Only items with at least this much protein
+            max_calories: Only items with fewer calories than this
+            has_calories: Only items with a positive calorie count
+        """
+        if dates is None:
+            dates = [datetime.now()]
+
+        if self.menu_store is None:
+            menus = self.fetch_menus(dining_halls, meal_types, dates).values()
+            if day is not None:
+                menus = [menu.where_equals('date', day) for menu in menus]
+            items = MenuTable.concat(menus)
+            mask = np.ones(len(items), dtype=bool)
+            if min_protein is not None:
+                mask &= items.column('protein') >= min_protein
+            if max_calories is not None:
+                mask &= items.column('calories') < max_calories
+            if has_calories:
+                mask &= items.column('calories') > 0
+            return items[mask]
+
+        weeks = {}
+        for dining_hall in dining_halls:
+            for meal_type in meal_types:
+                for date in dates:
+                    weeks.setdefault(self._get_cache_key(dining_hall, meal_type, date), (dining_hall, meal_type, date))
+
+        # Fetched (or stale-while-revalidate) weeks land in the store before it is queried
+        timestamps = self.menu_store.timestamps(list(weeks))
+        now = datetime.now()
+        uncached = [week for cache_key, week in weeks.items()
+                    if cache_key not in timestamps
+                    or now - datetime.fromisoformat(timestamps[cache_key]) >= self.cache_ttl]
+        if uncached:
+            halls, meals, week_dates = zip(*uncached)
+            self.fetch_menus(list(dict.fromkeys(halls)), list(dict.fromkeys(meals)), list(dict.fromkeys(week_dates)))
+
+        return self.menu_store.query(list(weeks), day=day, min_protein=min_protein,
+                                     max_calories=max_calories, has_calories=has_calories)
+
+    def _fetch_from_api(self, dining_hall: str, meal_type: str, date: datetime, cache_key: str) -> MenuTable:
+        """
+        Fetch a week of menu items from the Nutrislice API and cache them.
+
+        Concurrent callers in this process share one request per cache key,
+        and processes sharing cache_dir take turns through a per-key lock
+        file, reusing the entry written by whichever fetched it first.
+        """
+        return self._fetch_flights.do(cache_key, self._fetch_exclusive, dining_hall, meal_type, date, cache_key)
+
+    def _key_lock(self, cache_key: str) -> FileLock:
+        """Cross-process lock guarding fetches and writes of one cache entry."""
+        return FileLock(self.cache_dir / ".locks" / f"{cache_key}.lock")
+
+    def _cache_version(self, cache_key: str) -> Optional[Union[int, str]]:
+        """Changes whenever the entry is rewritten: file mtime, or the stored timestamp."""
+        if self.menu_store is not None:
+            return self.menu_store.version(cache_key)
+        try:
+            return self._cache_path(cache_key).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _fetch_exclusive(self, dining_hall: str, meal_type: str, date: datetime, cache_key: str) -> MenuTable:
+        """Hold the cross-process lock for cache_key while fetching it."""
+        seen = self._cache_version(cache_key)
+        lock = self._key_lock(cache_key)
+        if not lock.acquire(timeout=self._lock_timeout):
+            # The holder is taking longer than any request could; fetch anyway
+            return self._request_menu(dining_hall, meal_type, date, cache_key)
+        try:
+            if self._cache_version(cache_key) != seen:
+                # Another process refreshed this week while we waited
+                menu_items = self._load_from_cache(cache_key)
+                if menu_items is not None:
+                    return menu_items
+            return self._request_menu(dining_hall, meal_type, date, cache_key)
+        finally:
+            lock.release()
+
+    @traced('api.fetch')
+    def _request_menu(self, dining_hall: str, meal_type: str, date: datetime, cache_key: str) -> MenuTable:
+        """Request a week from the API (conditionally if a stale entry exists) and cache it."""
         year = date.year
         month = f"{date.month:02d}"
         day = f"{date.day:02d}"
 
         url = f"{self.base_url}/{dining_hall}/menu-type/{meal_type}/{year}/{month}/{day}/"
 
+        # An expired entry's validators let the API answer 304 if the week is unchanged
+        stale = self._load_stale_entry(cache_key) or {}
+        stale_validators = {field: stale[field] for field, _, _ in VALIDATOR_HEADERS if stale.get(field)}
+        headers = {request_header: stale[field] for field, _, request_header in VALIDATOR_HEADERS if stale.get(field)}
+
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Extract menu items from the response
-            menu_items = []
-            for day in data.get('days', []):
-                day_date = day.get('date', '')  # Get the date for this day
-                for item in day.get('menu_items', []):
-                    food = item.get('food', {})
-
-                    # Parse nutritional info
-                    if food is not None:
-                        serving_size_info = food.get('serving_size_info', {})
-                        nutrition = food.get('rounded_nutrition_info', {})
-
-                        # Fix serving size for pounds (1 lb serving = 0.25 lbs actual)
-                        amount = serving_size_info.get('serving_size_amount', '')
-                        unit = serving_size_info.get('serving_size_unit', '')
-
-                        if unit and 'lb' in unit.lower() and amount:
-                            try:
-                                amount_float = float(amount)
-                                amount = str(amount_float * 0.25)
-                            except (ValueError, TypeError):
-                                pass
-
-                        serving_str = f"{amount} {unit}".strip()
-
-                        menu_items.append({
-                            'name': food.get('name', 'Unknown'),
-                            'calories': nutrition.get('calories', 0) or 0,
-                            'protein': nutrition.get('g_protein', 0) or 0,
-                            'fat': nutrition.get('g_fat', 0) or 0,
-                            'carbs': nutrition.get('g_carbs', 0) or 0,
-                            'sodium': nutrition.get('mg_sodium', 0) or 0,
-                            'serving': serving_str,
-                            'dining_hall': self.dining_halls.get(dining_hall, dining_hall),
-                            'date': day_date  # Add date to each item
-                        })
+            with span('http.request', url=url):
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=self.stream_json)
+            # Close on every path: an unread streamed body holds its pooled connection
+            with response:
+                response.raise_for_status()
+                validators = {field: response.headers[response_header]
+                              for field, response_header, _ in VALIDATOR_HEADERS if response.headers.get(response_header)}
+
+                if response.status_code == 304 and headers:
+                    # Not modified: keep the cached items and just restart their TTL
+                    validators = {**stale_validators, **validators}
+                    menu_table = self._entry_table(stale)
+                    self._save_to_cache(cache_key, menu_table, validators)
+                    return menu_table
+
+                hall_name = self.dining_halls.get(dining_hall, dining_hall)
+
+                # Extract menu items from the response
+                if self.stream_json:
+                    # Body download, JSON decode and extraction interleave, so they share one span
+                    with span('http.stream_parse'):
+                        menu_items = list(iter_menu_items(response.iter_content(chunk_size=65536), hall_name))
+                else:
+                    with span('json.decode'):
+                        data = response.json()
+                    with span('extract'):
+                        menu_items = extract_menu_items(data, hall_name)
+
+            # Categorize once here so warm cache loads never recompute it
+            with span('table.build'):
+                menu_table = MenuTable.from_records(menu_items)
+            menu_table = self._with_categories(menu_table)
 
             # Save to cache
-            self._save_to_cache(cache_key, menu_items)
-            return menu_items
+            self._save_to_cache(cache_key, menu_table, validators)
+            return menu_table
 
         except Exception as e:
             print(f"Error fetching menu from {dining_hall}: {e}")
-            return []
+            return MenuTable.empty()
 
     def get_available_days(self, dining_hall: str, meal_type: str, date: datetime = None) -> List[str]:
         """Get list of available days from cached or fetched menu data."""
-        items = self.fetch_menu(dining_hall, meal_type, date, verbose=False)
-        # Extract unique dates
-        dates = sorted(set(item['date'] for item in items if item.get('date')))
-        return dates
+        if date is None:
+            date = datetime.now()
+        cache_key = self._get_cache_key(dining_hall, meal_type, date)
+
+        menu_items = self.memory_cache.get(cache_key)
+        if menu_items is None:
+            # A fresh entry's day index answers this without loading its items
+            try:
+                metadata = self._read_cache_metadata(cache_key)
+                if (metadata is not None and 'days' in metadata and
+                        datetime.now() - datetime.fromisoformat(metadata['timestamp']) < self.cache_ttl):
+                    return sorted(day for day in metadata['days'] if day)
+            except CACHE_READ_ERRORS:
+                pass
+            menu_items = self.fetch_menu(dining_hall, meal_type, date, verbose=False)
+        return sorted(day for day in menu_items.runs('date') if day)
 
     def _parse_nutrition(self, nutrition_str: str) -> Dict[str, float]:
         """Parse the nutrition string into a dictionary."""
@@ -181,59 +784,28 @@ class DiningHallOptimizer:
 
     def categorize_food(self, item: Dict) -> str:
         """Categorize a food item based on its name and nutrition."""
-        name = item['name'].lower()
-
-        # Define keywords for each category
-        protein_keywords = [
-            'chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'turkey', 'duck',
-            'tofu', 'tempeh', 'seitan', 'egg', 'shrimp', 'steak', 'patty', 'sausage',
-            'bacon', 'ham', 'lamb', 'tilapia', 'cod', 'halibut', 'edamame', 'beans'
-        ]
-
-        carb_keywords = [
-            'rice', 'pasta', 'bread', 'potato', 'fries', 'noodle', 'quinoa', 'couscous',
-            'tortilla', 'bun', 'roll', 'bagel', 'cereal', 'oat', 'waffle', 'pancake',
-            'muffin', 'biscuit', 'mac', 'macaroni', 'spaghetti', 'penne', 'linguine'
-        ]
-
-        vegetable_keywords = [
-            'broccoli', 'salad', 'lettuce', 'spinach', 'kale', 'carrot', 'broccolini',
-            'tomato', 'cucumber', 'pepper', 'green beans', 'corn', 'peas', 'mushroom',
-            'vegetable', 'greens', 'cabbage', 'cauliflower', 'asparagus', 'zucchini',
-            'squash', 'brussels', 'bok choy', 'celery', 'onion', 'eggplant'
-        ]
-
-        fruit_keywords = [
-            'apple', 'banana', 'orange', 'berry', 'strawberry', 'blueberry', 'melon',
-            'grape', 'pineapple', 'mango', 'peach', 'pear', 'fruit', 'watermelon'
-        ]
-
-        # Check keywords (protein first as it's most important)
-        for keyword in protein_keywords:
-            if keyword in name:
-                return 'protein'
-
-        for keyword in vegetable_keywords:
-            if keyword in name:
-                return 'vegetable'
-
-        for keyword in fruit_keywords:
-            if keyword in name:
-                return 'fruit'
-
-        for keyword in carb_keywords:
-            if keyword in name:
-                return 'carb'
-
-        # Use nutrition to help classify ambiguous items
-        if item['protein'] >= 15:  # High protein content
-            return 'protein'
-        elif item['carbs'] >= 25 and item['protein'] < 8:  # High carb, low protein
-            return 'carb'
-        elif item['calories'] < 50 and item['carbs'] < 15:  # Low calorie, likely veggie
-            return 'vegetable'
-
-        return 'other'
+        return categorize(item['name'], item['protein'], item['carbs'], item['calories'])
+
+    @traced('categorize')
+    def categorize_items(self, menu_items: MenuTable) -> np.ndarray:
+        """Category of every item in a table, using the persisted 'category' column when present."""
+        codes, values = menu_items.string_column('category')
+        if values and (codes >= 0).all():
+            return np.array(values)[codes]
+
+        # Categorize each distinct food once; repeats across days share its category
+        first, refs = menu_items.factorize(['name', 'protein', 'carbs', 'calories'])
+        foods = menu_items.take(first)
+        categories = np.array([categorize(name, protein, carbs, calories) for name, protein, carbs, calories in zip(
+            foods.strings('name'), foods.column('protein').tolist(),
+            foods.column('carbs').tolist(), foods.column('calories').tolist())], dtype='<U9')
+        return categories[refs]
+
+    def _with_categories(self, menu_items: MenuTable) -> MenuTable:
+        """Add a 'category' column so categories are stored with the cached menu."""
+        if 'category' in menu_items.fields or not len(menu_items):
+            return menu_items
+        return menu_items.with_string_column('category', self.categorize_items(menu_items).tolist())
 
     def calculate_meal_score(self, items: List[Dict], protein_goal: float,
                             calorie_limit: float) -> Tuple[float, Dict]:
@@ -298,7 +870,7 @@ class DiningHallOptimizer:
             }
 
         # 4. Meal composition (0-15 points)
-        categories = [self.categorize_food(item) for item in items]
+        categories = [item.get('category') or self.categorize_food(item) for item in items]
         composition_score = 0
 
         has_protein = 'protein' in categories
@@ -325,8 +897,106 @@ class DiningHallOptimizer:
 
         return score, reasons
 
-    def find_combinations(self, menu_items: List[Dict], protein_goal: float,
-                         calorie_limit: float, dining_hall_filter: Optional[str] = None) -> List[Tuple[List[Dict], float, float]]:
+    def score_many(self, menu_items: MenuTable, combos: np.ndarray, protein_goal: float,
+                   calorie_limit: float) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Score many meal combinations at once (vectorized calculate_meal_score).
+
+        Args:
+            menu_items: Table the combos index into
+            combos: (n, width) array of item indexes, rows padded with -1
+            protein_goal: Minimum protein target in grams
+            calorie_limit: Maximum calories allowed
+
+        Returns (scores, details): scores[i] equals calculate_meal_score(...)[0]
+        for combo i, and details holds per-combo 'protein_efficiency',
+        'precision', 'macro_balance' and 'composition' arrays (0 for combos that
+        miss the protein goal or calorie limit).
+        """
+        if len(combos) == 0:
+            empty = np.zeros(0)
+            return empty, {key: empty for key in ('protein_efficiency', 'precision', 'macro_balance', 'composition')}
+        combos = np.asarray(combos, dtype=np.intp).reshape(len(combos), -1)
+        valid = combos >= 0
+        safe = np.maximum(combos, 0)
+
+        def total(field: str) -> np.ndarray:
+            # Sum slot by slot, in item order, so results match sum() bit for bit
+            values = np.where(valid, menu_items.column(field)[safe], 0.0)
+            result = np.zeros(len(combos))
+            for column in values.T:
+                result = result + column
+            return result
+
+        total_protein = total('protein')
+        total_calories = total('calories')
+        total_fat = total('fat')
+        total_carbs = total('carbs')
+
+        # Must meet basic requirements
+        meets = (total_protein >= protein_goal) & (total_calories <= calorie_limit)
+
+        # 1. Protein efficiency (0-40 points) - PRIMARY metric
+        protein_per_cal = total_protein / np.maximum(total_calories, 1)
+        efficiency_score = np.minimum(protein_per_cal * 80, 40)
+
+        # 2. Precision bonus (0-20 points) - closer to targets is better
+        protein_waste = total_protein - protein_goal
+        protein_precision = np.maximum(0, 10 - protein_waste * 0.3)
+        calorie_usage = total_calories / max(calorie_limit, 1)
+        calorie_precision = np.where(calorie_usage <= 1, 10 * calorie_usage, 0)
+        precision_score = protein_precision + calorie_precision
+
+        # 3. Balanced macros (0-25 points)
+        total_cals_from_macros = (total_protein * 4) + (total_carbs * 4) + (total_fat * 9)
+        has_macros = total_cals_from_macros > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            protein_pct = (total_protein * 4) / total_cals_from_macros
+            carb_pct = (total_carbs * 4) / total_cals_from_macros
+            fat_pct = (total_fat * 9) / total_cals_from_macros
+
+        # Ideal ranges: protein 25-35%, carbs 40-55%, fat 20-30%
+        balance_score = (
+            np.select([(0.25 <= protein_pct) & (protein_pct <= 0.35),
+                       (0.20 <= protein_pct) & (protein_pct <= 0.40)], [10, 5], 0)
+            + np.select([(0.40 <= carb_pct) & (carb_pct <= 0.55),
+                         (0.30 <= carb_pct) & (carb_pct <= 0.65)], [10, 5], 0)
+            + np.select([(0.20 <= fat_pct) & (fat_pct <= 0.30),
+                         (0.15 <= fat_pct) & (fat_pct <= 0.40)], [5, 2], 0)
+        )
+        balance_score = np.where(has_macros, balance_score, 0)
+
+        # 4. Meal composition (0-15 points)
+        categories = np.array(['carb', 'fruit', 'other', 'protein', 'vegetable'])  # sorted for searchsorted
+        category_codes = np.searchsorted(categories, self.categorize_items(menu_items))
+        present = np.zeros((len(combos), len(categories)), dtype=bool)
+        rows = np.broadcast_to(np.arange(len(combos))[:, None], combos.shape)
+        present[rows[valid], category_codes[combos[valid]]] = True
+        has_protein = present[:, 3]
+        has_vegetable = present[:, 4] | present[:, 1]
+        has_carb = present[:, 0]
+
+        composition_score = has_protein * 7 + has_vegetable * 5 + has_carb * 2
+        # Diversity bonus - encourage variety
+        composition_score = composition_score + np.minimum(present.sum(axis=1), 3)
+        composition_score = np.minimum(composition_score, 15)
+
+        scores = efficiency_score + precision_score
+        scores = np.where(has_macros, scores + balance_score, scores)
+        scores = scores + composition_score
+
+        details = {
+            'protein_efficiency': protein_per_cal,
+            'precision': precision_score,
+            'macro_balance': balance_score,
+            'composition': composition_score,
+        }
+        return np.where(meets, scores, 0), {key: np.where(meets, value, 0) for key, value in details.items()}
+
+    @traced('find_combinations')
+    def find_combinations(self, menu_items: Union[MenuTable, List[Dict]], protein_goal: float,
+                         calorie_limit: float, dining_hall_filter: Optional[str] = None,
+                         exhaustive: bool = False) -> List[Tuple[List[Dict], float, float]]:
         """
         Find meal combinations that meet protein goal under calorie limit.
 
@@ -337,132 +1007,169 @@ class DiningHallOptimizer:
         4. Sort by protein efficiency
 
         Args:
-            menu_items: List of all menu items
+            menu_items: All menu items (MenuTable or list of item dicts)
             protein_goal: Minimum protein target in grams
             calorie_limit: Maximum calories allowed
             dining_hall_filter: Optional - filter to only one dining hall
+            exhaustive: Search each strategy over every qualifying item instead
+                        of the top-N protein/vegetable/carb slices
 
         Returns list of (items, total_protein, total_calories) tuples.
         """
-        valid_combos = []
+        if not isinstance(menu_items, MenuTable):
+            menu_items = MenuTable.from_records(menu_items)
+
+        def top(n: int) -> Optional[int]:
+            # Slice bound for the top-N pools; exhaustive mode uses whole pools
+            return None if exhaustive else n
 
         # Filter out items with no nutritional info or unreasonably high calories
-        valid_items = [item for item in menu_items
-                      if item['calories'] > 0
-                      and item['calories'] < calorie_limit]
+        calories = menu_items.column('calories')
+        valid_mask = (calories > 0) & (calories < calorie_limit)
 
         # Filter by dining hall if specified
         if dining_hall_filter:
-            valid_items = [item for item in valid_items if item['dining_hall'] == dining_hall_filter]
-            print(f"  Filtering to {dining_hall_filter} only ({len(valid_items)} items)...")
+            valid_mask &= menu_items.equals_mask('dining_hall', dining_hall_filter)
+            print(f"  Filtering to {dining_hall_filter} only ({int(valid_mask.sum())} items)...")
+        valid_table = menu_items[valid_mask]
 
         # Calculate efficiency metrics for all items
-        for item in valid_items:
-            item['category'] = self.categorize_food(item)
-            item['protein_efficiency'] = item['protein'] / max(item['calories'], 1)
+        protein = valid_table.column('protein')
+        calories = valid_table.column('calories')
+        carbs = valid_table.column('carbs')
+        names = valid_table.string_column('name')[0]
+        efficiency = protein / np.maximum(calories, 1)
+        categories = self.categorize_items(valid_table)
+        valid_items = valid_table.to_records()
+        for item, category, item_efficiency in zip(valid_items, categories.tolist(), efficiency.tolist()):
+            item['category'] = category
+            item['protein_efficiency'] = item_efficiency
 
         # Strategy: Get the BEST items by protein efficiency
+        # (np.lexsort is stable and sorts by its last key first)
 
         # Top protein sources (best protein/calorie ratio, min 10g protein)
-        high_protein_items = [item for item in valid_items if item['protein'] >= 10]
-        high_protein_items.sort(key=lambda x: (-x['protein_efficiency'], -x['protein']))
-        top_proteins = high_protein_items[:30]  # Top 30 protein-efficient items
+        high_protein = np.flatnonzero(protein >= 10)
+        high_protein = high_protein[np.lexsort((-protein[high_protein], -efficiency[high_protein]))]
+        top_proteins = high_protein[:top(30)]  # Top 30 protein-efficient items
 
         # Quality vegetables (nutrient-dense, low calorie)
-        veggie_items = [item for item in valid_items
-                       if item['category'] in ['vegetable', 'fruit']
-                       and item['calories'] < 100]  # Low calorie veggies
-        veggie_items.sort(key=lambda x: (-x['protein_efficiency'], x['calories']))
-        top_veggies = veggie_items[:25]  # Top 25 veggies
+        veggies = np.flatnonzero(np.isin(categories, ['vegetable', 'fruit'])
+                                 & (calories < 100))  # Low calorie veggies
+        veggies = veggies[np.lexsort((calories[veggies], -efficiency[veggies]))]
+        top_veggies = veggies[:top(25)]  # Top 25 veggies
 
         # Quality carbs (good energy sources with decent protein)
-        carb_items = [item for item in valid_items
-                     if item['category'] == 'carb'
-                     and item['carbs'] >= 15  # Substantial carbs
-                     and item['calories'] < 300]  # Not too calorie-dense
-        carb_items.sort(key=lambda x: (-x['protein_efficiency'], x['calories']))
-        top_carbs = carb_items[:20]  # Top 20 quality carbs
+        quality_carbs = np.flatnonzero((categories == 'carb')
+                                       & (carbs >= 15)  # Substantial carbs
+                                       & (calories < 300))  # Not too calorie-dense
+        quality_carbs = quality_carbs[np.lexsort((calories[quality_carbs], -efficiency[quality_carbs]))]
+        top_carbs = quality_carbs[:top(20)]  # Top 20 quality carbs
 
         print(f"  Found {len(top_proteins)} high-protein items, {len(top_veggies)} vegetables, {len(top_carbs)} quality carbs")
 
-        # Build combinations using efficiency-optimized items
-
-        # Strategy 1: Best Protein + Vegetable (lean & clean)
-        for protein in top_proteins[:15]:  # Top 15 proteins
-            for veggie in top_veggies[:15]:  # Top 15 vegetables
-                if protein['name'] == veggie['name']:
-                    continue  # Skip duplicates
-
-                combo = [protein, veggie]
-                total_protein = sum(i['protein'] for i in combo)
-                total_calories = sum(i['calories'] for i in combo)
-
-                if total_protein >= protein_goal and total_calories <= calorie_limit:
-                    valid_combos.append((combo, total_protein, total_calories))
-
-        # Strategy 2: Best Protein + Vegetable + Quality Carb (balanced performance)
-        for protein in top_proteins[:12]:  # Top 12 proteins
-            for veggie in top_veggies[:12]:  # Top 12 vegetables
-                if protein['name'] == veggie['name']:
-                    continue
-
-                for carb in top_carbs[:10]:  # Top 10 carbs
-                    if carb['name'] in [protein['name'], veggie['name']]:
-                        continue
-
-                    combo = [protein, veggie, carb]
-                    total_protein = sum(i['protein'] for i in combo)
-                    total_calories = sum(i['calories'] for i in combo)
-
-                    if total_protein >= protein_goal and total_calories <= calorie_limit:
-                        valid_combos.append((combo, total_protein, total_calories))
-
-        # Strategy 3: Best Protein + Quality Carb (simple & effective)
-        for protein in top_proteins[:15]:
-            for carb in top_carbs[:12]:
-                if protein['name'] == carb['name']:
-                    continue
-
-                combo = [protein, carb]
-                total_protein = sum(i['protein'] for i in combo)
-                total_calories = sum(i['calories'] for i in combo)
-
-                if total_protein >= protein_goal and total_calories <= calorie_limit:
-                    valid_combos.append((combo, total_protein, total_calories))
-
-        # Strategy 4: Double Best Protein + Vegetable (high protein focus)
-        for i, protein1 in enumerate(top_proteins[:10]):
-            for protein2 in top_proteins[i+1:15]:
-                for veggie in top_veggies[:10]:
-                    if veggie['name'] in [protein1['name'], protein2['name']]:
-                        continue
+        # Build combinations using efficiency-optimized items. Each strategy is
+        # evaluated as one broadcast over its pools; survivors come back in
+        # nested-loop order so dedup and ranking match the loop implementation.
+        strategies = [
+            # Strategy 1: Best Protein + Vegetable (lean & clean)
+            dict(pools=[top_proteins[:top(15)], top_veggies[:top(15)]], distinct=[(0, 1)]),
+            # Strategy 2: Best Protein + Vegetable + Quality Carb (balanced performance)
+            dict(pools=[top_proteins[:top(12)], top_veggies[:top(12)], top_carbs[:top(10)]],
+                 distinct=[(0, 1), (0, 2), (1, 2)]),
+            # Strategy 3: Best Protein + Quality Carb (simple & effective)
+            dict(pools=[top_proteins[:top(15)], top_carbs[:top(12)]], distinct=[(0, 1)]),
+            # Strategy 4: Double Best Protein + Vegetable (high protein focus)
+            dict(pools=[top_proteins[:top(10)], top_proteins[:top(15)], top_veggies[:top(10)]],
+                 distinct=[(0, 2), (1, 2)], increasing=[(0, 1)]),
+            # Strategy 5: Single item if it's exceptionally efficient
+            dict(pools=[top_proteins[:top(20)]]),
+        ]
 
-                    combo = [protein1, protein2, veggie]
-                    total_protein = sum(i['protein'] for i in combo)
-                    total_calories = sum(i['calories'] for i in combo)
+        # Stream candidates chunk by chunk through dedup and a bounded top-15
+        # selector, so the full candidate list (millions of rows in exhaustive
+        # mode) is never materialized or sorted
+        unique_name_sets = UniqueNameSets(names)
+        top_combos = TopK(15)
+        for strategy in strategies:
+            for found, found_protein, found_calories in traced_iter('search.candidates', iter_template(
+                    protein=protein, calories=calories, names=names,
+                    protein_goal=protein_goal, calorie_limit=calorie_limit, **strategy)):
+                # Remove duplicates (same set of item names, first occurrence wins)
+                with span('search.dedup'):
+                    keep = unique_name_sets.first_seen(found)
+                    found_protein, found_calories = found_protein[keep], found_calories[keep]
+
+                # Rank by protein efficiency (protein/calorie ratio), then by total protein
+                with span('search.sort'):
+                    top_combos.push(found_protein / np.maximum(found_calories, 1), found_protein,
+                                    combos=pad_combos(found[keep]), protein=found_protein, calories=found_calories)
+
+        # Return top 15 combinations
+        best = top_combos.result()
+        if not best:
+            return []
+        return [([valid_items[i] for i in combo if i >= 0], total_protein, total_calories)
+                for combo, total_protein, total_calories
+                in zip(best['combos'].tolist(), best['protein'].tolist(), best['calories'].tolist())]
+
+    def find_meals(self, dining_halls: List[str], meal_type: str, protein_goal: float, calorie_limit: float,
+                   dates: Optional[List[datetime]] = None, day: Optional[str] = None,
+                   exhaustive: bool = False) -> List[Tuple[List[Dict], float, float]]:
+        """find_combinations over the selected menus, with its item filter pushed down into query_items."""
+        items = self.query_items(dining_halls, [meal_type], dates, day=day, max_calories=calorie_limit,
+                                 has_calories=True)
+        return self.find_combinations(items, protein_goal, calorie_limit, exhaustive=exhaustive)
+
+    @traced('find_optimal_combinations')
+    def find_optimal_combinations(self, menu_items: Union[MenuTable, List[Dict]], protein_goal: float,
+                                  calorie_limit: float, dining_hall_filter: Optional[str] = None,
+                                  max_items: int = 4, top_k: int = 15) -> List[Tuple[List[Dict], float, float]]:
+        """
+        Find the provably best meal combinations with an exact knapsack solver.
 
-                    if total_protein >= protein_goal and total_calories <= calorie_limit:
-                        valid_combos.append((combo, total_protein, total_calories))
+        Unlike find_combinations, this does not use fixed templates or top-N
+        slices: every meal of up to max_items distinct foods is considered, and
+        the top_k by protein efficiency (then total protein) are returned.
+        Meals that only add filler to a smaller meal meeting the goal are
+        left out, so each result is a distinct meal.
 
-        # Strategy 5: Single item if it's exceptionally efficient
-        for item in top_proteins[:20]:
-            if item['protein'] >= protein_goal and item['calories'] <= calorie_limit:
-                combo = [item]
-                valid_combos.append((combo, item['protein'], item['calories']))
+        Args:
+            menu_items: All menu items (MenuTable or list of item dicts)
+            protein_goal: Minimum protein target in grams
+            calorie_limit: Maximum calories allowed
+            dining_hall_filter: Optional - filter to only one dining hall
+            max_items: Maximum number of items per meal
+            top_k: Number of combinations to return (at least 1)
 
-        # Remove duplicates
-        unique_combos = []
-        seen = set()
-        for combo in valid_combos:
-            items_key = tuple(sorted(item['name'] for item in combo[0]))
-            if items_key not in seen:
-                seen.add(items_key)
-                unique_combos.append(combo)
+        Returns list of (items, total_protein, total_calories) tuples.
+        Memory grows linearly with calorie_limit (see meal_solver.solve_top_k).
+        """
+        if not isinstance(menu_items, MenuTable):
+            menu_items = MenuTable.from_records(menu_items)
 
-        # Sort by protein efficiency (protein/calorie ratio), then by total protein
-        unique_combos.sort(key=lambda x: (-x[1]/max(x[2], 1), -x[1]))
+        if dining_hall_filter:
+            menu_items = menu_items[menu_items.equals_mask('dining_hall', dining_hall_filter)]
+            print(f"  Filtering to {dining_hall_filter} only ({len(menu_items)} items)...")
+
+        protein = menu_items.column('protein')
+        calories = menu_items.column('calories')
+        with span('search.solve'):
+            combos, combo_protein, combo_calories = solve_top_k(
+                calories, protein, menu_items.string_column('name')[0],
+                protein_goal, calorie_limit, max_items=max_items, top_k=top_k)
+
+        # Annotate only the items that made it into a result
+        used = np.unique(combos[combos >= 0])
+        used_table = menu_items.take(used)
+        items = dict(zip(used.tolist(), used_table.to_records()))
+        for item, category in zip(items.values(), self.categorize_items(used_table).tolist()):
+            item['category'] = category
+            item['protein_efficiency'] = item['protein'] / max(item['calories'], 1)
 
-        return unique_combos[:15]  # Return top 15 combinations
+        return [([items[i] for i in row if i >= 0], float(total_protein), float(total_calories))
+                for row, total_protein, total_calories
+                in zip(combos.tolist(), combo_protein.tolist(), combo_calories.tolist())]
 
     def display_results(self, combinations: List[Tuple[List[Dict], float, float]]):
         """Display the meal combinations in a simple list format."""
@@ -518,38 +1225,52 @@ class DiningHallOptimizer:
         print("=" * 90)
 
 
-    def show_top_items(self, menu_items: List[Dict], top_n: int = 10):
+    @traced('rank_items')
+    def rank_items(self, menu_items: Union[MenuTable, List[Dict]], top_n: int = 10,
+                   min_protein: float = 12) -> List[Dict]:
+        """
+        Rank items by protein-to-calorie ratio.
+
+        Items need at least min_protein grams of protein and valid calories, and
+        duplicates (same name + dining hall) are dropped. Returns the top_n items
+        as dicts with an added 'protein_efficiency' key, highest first.
+        """
+        if not isinstance(menu_items, MenuTable):
+            menu_items = MenuTable.from_records(menu_items)
+
+        # Filter items with meaningful protein and valid calories
+        calories = menu_items.column('calories')
+        protein = menu_items.column('protein')
+        valid = np.flatnonzero((calories > 0) & (protein >= min_protein))
+
+        # Remove duplicates by name + dining hall (first occurrence wins)
+        with span('rank.dedup'):
+            unique = valid[menu_items.take(valid).first_occurrences(['name', 'dining_hall'])]
+
+        # Select the top N by protein efficiency (highest first) without a full sort
+        with span('rank.sort'):
+            efficiency = protein[unique] / calories[unique]
+            order = top_k_indices(top_n, efficiency)
+
+        ranked = menu_items.take(unique[order]).with_column('protein_efficiency', efficiency[order])
+        return ranked.to_records()
+
+    def top_items(self, dining_halls: List[str], meal_type: str, dates: Optional[List[datetime]] = None,
+                  day: Optional[str] = None, top_n: int = 10, min_protein: float = 12) -> List[Dict]:
+        """rank_items over the selected menus, with its item filter pushed down into query_items."""
+        items = self.query_items(dining_halls, [meal_type], dates, day=day, min_protein=min_protein,
+                                 has_calories=True)
+        return self.rank_items(items, top_n=top_n, min_protein=min_protein)
+
+    def show_top_items(self, menu_items: Union[MenuTable, List[Dict]], top_n: int = 10):
         """Show top N items with best protein-to-calorie ratio."""
-        # Filter items with meaningful protein (min 12g) and valid calories
-        valid_items = [item for item in menu_items
-                      if item['calories'] > 0 and item['protein'] >= 12]
-
-        # Remove duplicates by name + dining hall
-        seen = set()
-        unique_items = []
-        for item in valid_items:
-            key = (item['name'], item['dining_hall'])
-            if key not in seen:
-                seen.add(key)
-                unique_items.append(item)
-
-        # Create a list with efficiency scores
-        items_with_efficiency = []
-        for item in unique_items:
-            protein_efficiency = item['protein'] / item['calories']
-            items_with_efficiency.append({
-                **item,
-                'protein_efficiency': protein_efficiency
-            })
-
-        # Sort by protein efficiency (highest first)
-        items_with_efficiency.sort(key=lambda x: -x['protein_efficiency'])
+        items_with_efficiency = self.rank_items(menu_items, top_n=top_n)
 
         # Display top N
         print(f"\n✅ Top {top_n} items by protein efficiency:\n")
         print("=" * 90)
 
-        for idx, item in enumerate(items_with_efficiency[:top_n], 1):
+        for idx, item in enumerate(items_with_efficiency, 1):
             print(f"\n{idx}. {item['name']}")
             print(f"   [{item['dining_hall']}] {item['serving']}")
             print(f"   Protein: {item['protein']:.1f}g | Calories: {item['calories']:.0f}")
@@ -559,12 +1280,108 @@ class DiningHallOptimizer:
         print("\n" + "=" * 90)
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Find high-protein items at Georgia Tech dining halls.")
+    parser.add_argument("--cache-dir", default=".cache", help="Directory for cached weekly menus")
+    parser.add_argument("--cache-backend", choices=["files", "sqlite"], default="files",
+                        help="Store weeks as files or in one indexed SQLite database")
+    parser.add_argument("--base-url", help="Weekly menu API root (default: $NUTRISLICE_BASE_URL or Nutrislice)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Time every stage, print per-stage statistics and write a Chrome trace to PATH")
+    subcommands = parser.add_subparsers(dest="command")
+
+    prefetch_parser = subcommands.add_parser(
+        "prefetch", help="Warm the cache for every dining hall and meal for the coming weeks")
+    prefetch_parser.add_argument("--meals", nargs="+", default=["lunch", "dinner"], help="Meal types to warm")
+    prefetch_parser.add_argument("--weeks", type=int, default=2,
+                                 help="Weeks to warm, starting with the current one (default: 2)")
+    prefetch_parser.add_argument("--max-workers", type=int, default=4, help="Maximum concurrent API requests")
+    prefetch_parser.add_argument("--interval", type=float, default=0,
+                                 help="Hours between runs; keeps running in the foreground (default: run once)")
+
+    profile_parser = subcommands.add_parser(
+        "profile", help="Profile a scripted session and write a collapsed-stack file for flame graphs")
+    profile_parser.add_argument("--halls", nargs="+", help="Dining hall ids to load (default: all)")
+    profile_parser.add_argument("--meal", default="lunch", help="Meal type to load (default: lunch)")
+    profile_parser.add_argument("--protein-goal", type=float, default=30, help="Grams of protein (default: 30)")
+    profile_parser.add_argument("--calorie-limit", type=float, default=500, help="Calories (default: 500)")
+    profile_parser.add_argument("--exact", action="store_true", help="Search with the exact solver")
+    profile_parser.add_argument("--profiler", choices=["cprofile", "sampling"], default="cprofile",
+                                help="Deterministic (calling thread only) or sampling (all threads)")
+    profile_parser.add_argument("--interval", type=float, default=0.001,
+                                help="Seconds between samples of the sampling profiler (default: 0.001)")
+    profile_parser.add_argument("--sort", choices=["cumulative", "tottime"], default="cumulative",
+                                help="Order of the hot-function report (default: cumulative)")
+    profile_parser.add_argument("--limit", type=int, default=30, help="Functions in the report (default: 30)")
+    profile_parser.add_argument("--collapsed", default="profile.folded",
+                                help="Collapsed-stack output for flame graphs (default: profile.folded)")
+    profile_parser.add_argument("--stats", help="Also dump raw cProfile stats (e.g. for snakeviz)")
+    profile_parser.add_argument("--cold", action="store_true", help="Start from an empty temporary cache")
+    profile_parser.add_argument("--stub", action="store_true",
+                                help="Fetch from a local stub serving synthetic menus (implies --cold)")
+
+    args = parser.parse_args(argv)
+    optimizer = DiningHallOptimizer(cache_dir=args.cache_dir, cache_backend=args.cache_backend,
+                                    base_url=args.base_url)
+    if args.trace:
+        tracer.enable()
+    try:
+        if args.command == "prefetch":
+            run_prefetch(optimizer, args)
+        elif args.command == "profile":
+            run_profile(optimizer, args)
+        else:
+            run_interactive(optimizer)
+    finally:
+        if args.trace:
+            print("\n" + tracer.format_summary())
+            tracer.write_chrome_trace(args.trace)
+            print(f"Wrote Chrome trace to {args.trace}")
+
+
+def run_prefetch(optimizer: DiningHallOptimizer, args: argparse.Namespace):
+    """Warm the cache once, or every --interval hours until interrupted."""
+    scheduler = PrefetchScheduler(optimizer, meal_types=args.meals, weeks=args.weeks,
+                                  interval=args.interval * 3600, max_workers=args.max_workers)
+    while True:
+        print(format_report(scheduler.run_once()))
+        if args.interval <= 0:
+            return
+        try:
+            time.sleep(args.interval * 3600)
+        except KeyboardInterrupt:
+            return
+
+
+def run_profile(optimizer: DiningHallOptimizer, args: argparse.Namespace):
+    """Profile one scripted session, print the hot functions and write collapsed stacks."""
+    with ExitStack() as resources:
+        if args.cold or args.stub:
+            base_url = resources.enter_context(stub_process(args.cache_dir)) if args.stub else optimizer.base_url
+            optimizer = resources.enter_context(DiningHallOptimizer(
+                cache_dir=resources.enter_context(tempfile.TemporaryDirectory()),
+                cache_backend=args.cache_backend, base_url=base_url))
+        halls = args.halls or list(optimizer.dining_halls)
+        start = time.perf_counter()
+        result, report, folded, stats = profile_call(
+            lambda: run_scenario(optimizer, halls, args.meal, args.protein_goal, args.calorie_limit, args.exact),
+            args.profiler, args.interval, args.sort, args.limit)
+        elapsed = time.perf_counter() - start
+
+    print(f"Profiled {', '.join(halls)} {args.meal} ({result['items']} items, "
+          f"{result['combinations']} combinations) in {elapsed:.3f}s with {args.profiler}\n")
+    print(report)
+    write_collapsed(folded, args.collapsed)
+    print(f"\nWrote collapsed stacks to {args.collapsed}")
+    if args.stats and stats is not None:
+        stats.dump_stats(args.stats)
+        print(f"Wrote cProfile stats to {args.stats}")
+
+
+def run_interactive(optimizer: DiningHallOptimizer):
     print("🍽️  Dining Hall Meal Optimizer")
     print("=" * 80)
 
-    optimizer = DiningHallOptimizer()
-
     # Get user inputs
     print("\nDining Hall:")
     print("1. West Village")
@@ -587,13 +1404,12 @@ def main():
 
     print(f"\n🔍 Loading {meal_type} menus...")
 
-    # Fetch menu
-    all_items = []
-    for hall_id in selected_halls:
-        print(f"  • {optimizer.dining_halls[hall_id]}:")
-        items = optimizer.fetch_menu(hall_id, meal_type, verbose=True)
-        all_items.extend(items)
+    # Fetch menus (cache misses for all halls are fetched in parallel)
+    menus = optimizer.fetch_menus(selected_halls, [meal_type], verbose=True)
+    for (hall_id, _, week), items in menus.items():
+        print(f"  • {optimizer.dining_halls[hall_id]} (week of {week}):")
         print(f"    → {len(items)} items available")
+    all_items = MenuTable.concat(menus.values())
 
     if not all_items:
         print("\n❌ Could not fetch menu data. Please try again later.")
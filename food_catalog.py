@@ -0,0 +1,42 @@
+"""
+Normalized food catalog.
+
+The same food (name, serving and nutrition) is served on several days of a
+week, at lunch and at dinner, so a weekly menu factors into its unique foods
+plus, for every item, a reference to its food and where/when it was served.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from menu_table import MenuTable
+
+# Fields describing an appearance of a food rather than the food itself
+APPEARANCE_FIELDS = ('dining_hall', 'date')
+
+
+def food_fields(table: MenuTable) -> List[str]:
+    """Fields of table that describe the food itself."""
+    return [field for field in table.fields if field not in APPEARANCE_FIELDS]
+
+
+def split_foods(table: MenuTable) -> Tuple[MenuTable, np.ndarray]:
+    """
+    Factor a menu into (foods, refs).
+
+    foods holds each distinct food once, in order of first appearance (its
+    appearance fields are those of that first item); refs[i] is the index of
+    item i's food, so foods.take(refs) restores every food field.
+    """
+    first, refs = table.factorize(food_fields(table))
+    return table.take(first), refs
+
+
+def food_id(food: Dict) -> str:
+    """Stable id of a food: a hash of its name, serving and nutrition."""
+    identity = sorted((field, value) for field, value in food.items()
+                      if field not in APPEARANCE_FIELDS and field != 'category')
+    return hashlib.blake2b(json.dumps(identity, separators=(',', ':')).encode('utf-8'), digest_size=8).hexdigest()
@@ -0,0 +1,224 @@
+"""
+Lightweight timing spans for the fetch and search pipelines.
+
+Code marks stages with `with span('cache.read'):` (or @traced / traced_iter).
+While the tracer is disabled, which is the default, span() returns a shared
+no-op context manager, so instrumented code pays one function call per stage.
+Once enabled, every span is recorded with its thread, aggregated into
+per-stage duration histograms and exportable as a Chrome trace
+(chrome://tracing or https://ui.perfetto.dev):
+
+    tracer.enable()
+    optimizer.fetch_menus(...)
+    print(tracer.format_summary())
+    tracer.write_chrome_trace('trace.json')
+"""
+
+import bisect
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Histogram bucket upper bounds in seconds: 1-2-5 steps from 1µs to 10s (plus an overflow bucket)
+BUCKET_EDGES = [multiplier * 10.0 ** exponent for exponent in range(-6, 1) for multiplier in (1, 2, 5)] + [10.0]
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Collects spans from every thread while enabled."""
+
+    def __init__(self, max_events: int = 200_000):
+        """
+        Args:
+            max_events: Maximum spans kept for the Chrome trace; later spans still
+                        count towards the summary
+        """
+        self.enabled = False
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter_ns()
+        self._durations: Dict[str, List[float]] = {}
+        self._events: List[Tuple[str, int, int, int, Dict]] = []
+        self._thread_names: Dict[int, str] = {}
+        self.dropped_events = 0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Drop everything recorded so far."""
+        with self._lock:
+            self._epoch = time.perf_counter_ns()
+            self._durations = {}
+            self._events = []
+            self._thread_names = {}
+            self.dropped_events = 0
+
+    def record(self, name: str, start_ns: int, end_ns: int, args: Optional[Dict] = None):
+        """Record one finished span (perf_counter_ns timestamps)."""
+        thread = threading.current_thread()
+        thread_id = thread.ident
+        with self._lock:
+            if thread_id not in self._thread_names:
+                # Pool threads may be gone by the time the trace is exported
+                self._thread_names[thread_id] = thread.name
+            self._durations.setdefault(name, []).append((end_ns - start_ns) / 1e9)
+            if len(self._events) < self.max_events:
+                self._events.append((name, start_ns, end_ns, thread_id, args or {}))
+            else:
+                self.dropped_events += 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage statistics, in order of first occurrence.
+
+        Each stage has count, total, mean, min, p50, p90, p99 and max (seconds)
+        and 'histogram': [[bucket upper bound in seconds (None = overflow), count], ...]
+        for the non-empty buckets.
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+
+        summary = {}
+        for name, values in durations.items():
+            counts = [0] * (len(BUCKET_EDGES) + 1)
+            for value in values:
+                counts[bisect.bisect_left(BUCKET_EDGES, value)] += 1
+            edges = BUCKET_EDGES + [None]
+            summary[name] = {
+                'count': len(values),
+                'total': sum(values),
+                'mean': sum(values) / len(values),
+                'min': values[0],
+                'p50': _percentile(values, 0.50),
+                'p90': _percentile(values, 0.90),
+                'p99': _percentile(values, 0.99),
+                'max': values[-1],
+                'histogram': [[edge, count] for edge, count in zip(edges, counts) if count],
+            }
+        return summary
+
+    def format_summary(self) -> str:
+        """Render summary() as a table, one row per stage, with a compact histogram."""
+        summary = self.summary()
+        if not summary:
+            return "No spans recorded"
+        width = max(len(name) for name in summary)
+        lines = [f"{'stage':<{width}} {'count':>7} {'total':>10} {'mean':>10} {'p50':>10} "
+                 f"{'p90':>10} {'p99':>10} {'max':>10}  histogram"]
+        for name, stats in summary.items():
+            histogram = ' '.join(f"{_format_edge(edge)}:{count}" for edge, count in stats['histogram'])
+            lines.append(f"{name:<{width}} {stats['count']:>7} "
+                         + ' '.join(f"{stats[key] * 1000:>8.3f}ms"
+                                    for key in ('total', 'mean', 'p50', 'p90', 'p99', 'max'))
+                         + f"  {histogram}")
+        if self.dropped_events:
+            lines.append(f"({self.dropped_events} spans beyond max_events left out of the Chrome trace)")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict:
+        """Recorded spans in Chrome Trace Event format (complete events, microseconds)."""
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+            epoch = self._epoch
+        pid = os.getpid()
+        threads = {}
+        trace_events = []
+        for name, start_ns, end_ns, thread_id, args in events:
+            tid = threads.setdefault(thread_id, len(threads) + 1)
+            trace_events.append({'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                                 'ts': (start_ns - epoch) / 1000, 'dur': (end_ns - start_ns) / 1000,
+                                 'args': args})
+        for thread_id, tid in threads.items():
+            trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                 'args': {'name': thread_names.get(thread_id, f"thread-{thread_id}")}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: Union[str, Path]):
+        """Write chrome_trace() as JSON to path."""
+        Path(path).write_text(json.dumps(self.chrome_trace()))
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: Tracer, name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> '_Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.args)
+
+
+# Process-wide tracer used by span(), traced() and traced_iter()
+tracer = Tracer()
+
+
+def span(name: str, **args):
+    """Context manager timing one stage; args (e.g. a cache key) are shown in the Chrome trace."""
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def traced(name: str) -> Callable:
+    """Decorator timing every call of a function as span name."""
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with _Span(tracer, name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_iter(name: str, iterable: Iterable) -> Iterator:
+    """Iterate over iterable, timing the production of each element as span name."""
+    if not tracer.enabled:
+        return iter(iterable)
+    return _traced_iter(name, iter(iterable))
+
+
+def _traced_iter(name: str, iterator: Iterator) -> Iterator:
+    while True:
+        start = time.perf_counter_ns()
+        try:
+            value = next(iterator)
+        except StopIteration:
+            return
+        tracer.record(name, start, time.perf_counter_ns())
+        yield value
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile of sorted values
+    return values[min(len(values), max(1, math.ceil(fraction * len(values)))) - 1]
+
+
+def _format_edge(edge: Optional[float]) -> str:
+    if edge is None:
+        return '>10s'
+    if edge < 1e-3:
+        return f"≤{edge * 1e6:g}µs"
+    if edge < 1:
+        return f"≤{edge * 1e3:g}ms"
+    return f"≤{edge:g}s"
+
@@ -0,0 +1,144 @@
+"""
+Exact top-K meal solver.
+
+Treats meal building as a bounded multi-constraint knapsack: pick at most
+max_items foods (each food name at most once) so that total protein meets
+the goal and total calories stay under the limit, maximizing protein per
+calorie.
+
+Protein efficiency is a ratio, so it is not additive. Instead the DP runs
+over whole-calorie totals and keeps, for every (item count, calorie total)
+state, the top_k highest-protein ways to reach it. Any meal in the global
+top_k by efficiency must also be in the top_k by protein among meals with
+the same calorie total, so reading all states and ranking them by
+protein/calorie gives the exact top_k. Calories are bucketed to whole
+numbers, which is exact for Nutrislice's rounded nutrition values.
+
+Adding a garnish (a few calories, little protein) to a good meal gives
+another feasible meal, so the raw top_k is mostly one meal with different
+fillers. Results therefore only include meals with no feasible sub-meal:
+every item is needed to reach the protein goal. Zero-protein items can never
+be needed, so they are left out of the DP altogether.
+"""
+
+from itertools import combinations
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ranking import top_k_indices
+
+
+def solve_top_k(calories: np.ndarray, protein: np.ndarray, names: np.ndarray,
+                protein_goal: float, calorie_limit: float, max_items: int = 4,
+                top_k: int = 15) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the top_k meals by protein efficiency.
+
+    Args:
+        calories, protein: Per-item columns
+        names: Per-item name codes; items sharing a code are alternatives
+               (a meal uses at most one of them)
+        protein_goal: Minimum total protein
+        calorie_limit: Maximum total calories
+        max_items: Maximum number of items in a meal
+        top_k: Number of meals to return
+
+    Returns (combos, total_protein, total_calories) where combos is an
+    (n, max_items) array of item indexes padded with -1, ranked by protein
+    efficiency then total protein (both descending). No returned meal
+    contains a smaller meal that also meets the goal and limit, and no two
+    returned meals have the same set of names.
+
+    The DP table takes (max_items + 1) * (calorie_limit + 1) * top_k *
+    (8 + 8 * max_items) bytes, twice while a name with several variants is
+    processed: about 1.5 MB for the defaults at 500 calories, 30 MB at
+    10,000, so memory grows linearly with calorie_limit.
+    """
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    limit = int(np.floor(calorie_limit))
+    buckets = np.rint(calories).astype(np.int64)
+
+    # Only items that fit on their own and add protein can be part of a meal;
+    # among items with the same name and calorie bucket, the highest-protein one dominates
+    candidates = np.flatnonzero((calories > 0) & (buckets <= limit) & ((protein > 0) | (protein_goal <= 0)))
+    variants: Dict[Tuple[int, int], int] = {}
+    for index in candidates[np.argsort(-protein[candidates], kind='stable')].tolist():
+        variants.setdefault((int(names[index]), int(buckets[index])), index)
+    groups: Dict[int, List[int]] = {}
+    for (name, _), index in variants.items():
+        groups.setdefault(name, []).append(index)
+
+    # best[k, c, r]: r-th best protein total using k items and exactly c calories
+    best = np.full((max_items + 1, limit + 1, top_k), -np.inf)
+    best[0, 0, 0] = 0.0
+    members = np.full((max_items + 1, limit + 1, top_k, max_items), -1, dtype=np.int64)
+
+    for group in groups.values():
+        # Every variant extends the states as they were before this group, so a
+        # meal never contains two items with the same name. Item counts are
+        # visited high to low, so a lone variant can read the live table.
+        if len(group) > 1:
+            base_best, base_members = best.copy(), members.copy()
+        else:
+            base_best, base_members = best, members
+        for index in group:
+            cost = int(buckets[index])
+            span = limit + 1 - cost
+            for k in range(max_items, 0, -1):
+                source = base_best[k - 1, :span] + protein[index]
+                # Only states whose worst kept meal can be beaten change
+                rows = np.flatnonzero(source[:, 0] > best[k, cost:, -1])
+                if not len(rows):
+                    continue
+                source_members = base_members[k - 1, rows]
+                source_members[..., k - 1] = index
+
+                targets = rows + cost
+                merged = np.concatenate([best[k, targets], source[rows]], axis=1)
+                merged_members = np.concatenate([members[k, targets], source_members], axis=1)
+                keep = np.argsort(-merged, axis=1, kind='stable')[:, :top_k]
+                best[k, targets] = np.take_along_axis(merged, keep, axis=1)
+                members[k, targets] = np.take_along_axis(merged_members, keep[..., None], axis=1)
+
+    # Collect feasible meals from every state and rank them on exact totals
+    found = members[1:][np.isfinite(best[1:])]
+    if not len(found):
+        return np.empty((0, max_items), dtype=np.int64), np.empty(0), np.empty(0)
+
+    valid = found >= 0
+    safe = np.maximum(found, 0)
+    total_protein = np.where(valid, protein[safe], 0.0).sum(axis=1)
+    total_calories = np.where(valid, calories[safe], 0.0).sum(axis=1)
+
+    feasible = (total_protein >= protein_goal) & (total_calories <= calorie_limit)
+    found, total_protein, total_calories = found[feasible], total_protein[feasible], total_calories[feasible]
+
+    # Rank every feasible meal, then keep the first top_k without a feasible
+    # sub-meal, one per set of names (variants of a food count as the same meal)
+    order = top_k_indices(len(found), total_protein / np.maximum(total_calories, 1), total_protein)
+    kept = []
+    seen_names = set()
+    for row in order.tolist():
+        meal = found[row]
+        meal_names = frozenset(names[meal[meal >= 0]].tolist())
+        if meal_names in seen_names or _has_feasible_sub_meal(meal, calories, protein, protein_goal, calorie_limit):
+            continue
+        seen_names.add(meal_names)
+        kept.append(row)
+        if len(kept) == top_k:
+            break
+    return found[kept].reshape(len(kept), max_items), total_protein[kept], total_calories[kept]
+
+
+def _has_feasible_sub_meal(meal: np.ndarray, calories: np.ndarray, protein: np.ndarray,
+                           protein_goal: float, calorie_limit: float) -> bool:
+    # Whether dropping some (not all) items still meets the goal and limit
+    items = meal[meal >= 0].tolist()
+    for size in range(1, len(items)):
+        for subset in combinations(items, size):
+            if (sum(protein[index] for index in subset) >= protein_goal
+                    and sum(calories[index] for index in subset) <= calorie_limit):
+                return True
+    return False
@@ -0,0 +1,481 @@
+"""
+Cache tiers for weekly menu data.
+"""
+
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+
+from food_catalog import APPEARANCE_FIELDS, split_foods
+from menu_table import MenuTable
+
+
+class MemoryCache:
+    """Thread-safe, bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 32, ttl_seconds: float = 3600):
+        """
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used
+            ttl_seconds: Maximum time an entry is served from memory
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether key holds an unexpired value (not counted as a hit and not marked as recently used)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, optionally expiring sooner than the cache-wide TTL."""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+
+class CacheSerializer:
+    """
+    Converts a cache entry ({'timestamp': ..., 'menu_items': ..., ...}) to and from bytes.
+
+    dumps accepts menu_items as a MenuTable or a list of item dicts; loads
+    always returns menu_items as a MenuTable.
+    """
+
+    name = ''
+    suffix = ''
+
+    def dumps(self, cache_data: Dict) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Dict:
+        raise NotImplementedError
+
+    def loads_metadata(self, data: bytes) -> Dict:
+        """Entry fields other than menu_items (formats with a header can skip the items)."""
+        cache_data = self.loads(data)
+        cache_data.pop('menu_items', None)
+        return cache_data
+
+
+class JsonSerializer(CacheSerializer):
+    """Plain JSON, one dict per menu item (the original cache format)."""
+
+    name = 'json'
+    suffix = '.json'
+
+    def __init__(self, indent: Optional[int] = None):
+        self.indent = indent
+
+    def dumps(self, cache_data: Dict) -> bytes:
+        cache_data = dict(cache_data)
+        if isinstance(cache_data.get('menu_items'), MenuTable):
+            cache_data['menu_items'] = cache_data['menu_items'].to_records()
+        if self.indent is None:
+            return json.dumps(cache_data, separators=(',', ':')).encode('utf-8')
+        return json.dumps(cache_data, indent=self.indent).encode('utf-8')
+
+    def loads(self, data: bytes) -> Dict:
+        cache_data = json.loads(data.decode('utf-8'))
+        cache_data['menu_items'] = MenuTable.from_records(cache_data.get('menu_items', []))
+        return cache_data
+
+
+class BinarySerializer(CacheSerializer):
+    """
+    Compact columnar format mirroring MenuTable.
+
+    Layout: magic, version byte, then a zlib-compressed body of
+      - u32 length + JSON header (entry metadata, item and food counts,
+        column names/types/scopes)
+      - u32 length + string table (unique strings joined by NUL)
+      - i32 food index of every item
+      - one little-endian column per field: i32 string-table indexes for text
+        fields (-1 if missing), float64 values for numeric fields (NaN if missing)
+
+    Items are stored as a food catalog (see food_catalog): food fields hold one
+    value per distinct food, appearance fields (date, dining hall) one per item.
+    Columns are loaded straight into NumPy arrays without per-item parsing.
+    Version 2 files (one value per item in every column) are still read.
+    """
+
+    name = 'binary'
+    suffix = '.bin'
+    MAGIC = b'DHMC'
+    VERSION = 3
+    READABLE_VERSIONS = (2, 3)
+
+    def __init__(self, compression_level: int = 6):
+        self.compression_level = compression_level
+
+    def dumps(self, cache_data: Dict) -> bytes:
+        table = cache_data.get('menu_items', [])
+        if not isinstance(table, MenuTable):
+            table = MenuTable.from_records(table)
+        metadata = {key: value for key, value in cache_data.items() if key != 'menu_items'}
+
+        # Food fields are stored once per distinct food, appearance fields once per item
+        foods, refs = split_foods(table)
+
+        # All text columns share one string table
+        string_index = {}
+        columns = []
+        for field in table.fields:
+            scope, source = ('item', table) if field in APPEARANCE_FIELDS else ('food', foods)
+            if source.is_numeric(field):
+                columns.append(('f', field, scope, source.column(field).astype('<f8')))
+            else:
+                codes, values = source.string_column(field)
+                remap = np.array([string_index.setdefault(value, len(string_index)) for value in values] + [-1],
+                                 dtype='<i4')
+                columns.append(('s', field, scope, remap[codes]))
+        string_table = list(string_index)
+
+        header = json.dumps({
+            'metadata': metadata,
+            'count': len(table),
+            'foods': len(foods),
+            'columns': [[kind, field, scope] for kind, field, scope, _ in columns],
+        }, separators=(',', ':')).encode('utf-8')
+        string_blob = '\0'.join(string_table).encode('utf-8')
+
+        parts = [struct.pack('<I', len(header)), header,
+                 struct.pack('<I', len(string_blob)), string_blob,
+                 refs.astype('<i4').tobytes()]
+        parts.extend(column.tobytes() for _, _, _, column in columns)
+
+        body = zlib.compress(b''.join(parts), self.compression_level)
+        return self.MAGIC + bytes([self.VERSION]) + body
+
+    def _check_preamble(self, data: bytes):
+        if data[:4] != self.MAGIC:
+            raise ValueError("Not a binary menu cache file")
+        if data[4] not in self.READABLE_VERSIONS:
+            raise ValueError(f"Unsupported binary cache version {data[4]}")
+
+    def loads(self, data: bytes) -> Dict:
+        self._check_preamble(data)
+        try:
+            return self._decode_body(zlib.decompress(data[5:]))
+        except (zlib.error, struct.error, IndexError) as e:
+            raise ValueError(f"Corrupt binary cache file: {e}") from e
+
+    def loads_metadata(self, data: bytes) -> Dict:
+        # The header leads the body, so only its first few KB need decompressing
+        self._check_preamble(data)
+        decompressor = zlib.decompressobj()
+        body = b''
+        try:
+            for offset in range(5, len(data), 1024):
+                body += decompressor.decompress(data[offset:offset + 1024])
+                if len(body) >= 4 and len(body) >= 4 + struct.unpack_from('<I', body, 0)[0]:
+                    break
+            (header_len,) = struct.unpack_from('<I', body, 0)
+            if len(body) < 4 + header_len:
+                raise ValueError("Corrupt binary cache file: truncated header")
+        except (zlib.error, struct.error) as e:
+            raise ValueError(f"Corrupt binary cache file: {e}") from e
+        return dict(json.loads(body[4:4 + header_len].decode('utf-8'))['metadata'])
+
+    def _decode_body(self, body: bytes) -> Dict:
+        (header_len,) = struct.unpack_from('<I', body, 0)
+        offset = 4
+        header = json.loads(body[offset:offset + header_len].decode('utf-8'))
+        offset += header_len
+
+        (table_len,) = struct.unpack_from('<I', body, offset)
+        offset += 4
+        string_table = body[offset:offset + table_len].decode('utf-8').split('\0') if table_len else []
+        offset += table_len
+
+        count = header['count']
+        # Version 2 has no food catalog: every column holds one value per item
+        food_count = header.get('foods')
+        refs = None
+        if food_count is not None:
+            refs = np.frombuffer(body, dtype='<i4', count=count, offset=offset).astype(np.intp)
+            offset += 4 * count
+
+        fields = []
+        numeric = {}
+        strings = {}
+        for kind, field, *scope in header['columns']:
+            per_food = scope == ['food']
+            length = food_count if per_food else count
+            dtype = np.dtype('<f8' if kind == 'f' else '<i4')
+            column = np.frombuffer(body, dtype=dtype, count=length, offset=offset)
+            offset += dtype.itemsize * length
+            if per_food:
+                column = column[refs]
+            fields.append(field)
+            if kind == 'f':
+                numeric[field] = column.astype(np.float64, copy=False)
+            else:
+                strings[field] = (column.astype(np.int32, copy=False), string_table)
+
+        cache_data = dict(header['metadata'])
+        cache_data['menu_items'] = MenuTable(fields, numeric, strings, count)
+        return cache_data
+
+
+SERIALIZERS = {
+    JsonSerializer.name: JsonSerializer,
+    BinarySerializer.name: BinarySerializer,
+}
+
+
+def get_serializer(serializer: Union[str, CacheSerializer]) -> CacheSerializer:
+    """Resolve a serializer name ('json', 'binary') or pass an instance through."""
+    if isinstance(serializer, CacheSerializer):
+        return serializer
+    try:
+        return SERIALIZERS[serializer]()
+    except KeyError:
+        raise ValueError(f"Unknown cache format '{serializer}' (expected one of {', '.join(SERIALIZERS)})")
+
+
+def cache_files(cache_dir: Union[str, Path]) -> List[Path]:
+    """Cache files in any supported format in cache_dir, in file name order."""
+    suffixes = {serializer_cls.suffix for serializer_cls in SERIALIZERS.values()}
+    return sorted(path for path in Path(cache_dir).iterdir() if path.suffix in suffixes)
+
+
+def read_cache_file(cache_file: Path) -> Dict:
+    """Decode a cache file with the serializer its suffix belongs to."""
+    for serializer_cls in SERIALIZERS.values():
+        if cache_file.suffix == serializer_cls.suffix:
+            return serializer_cls().loads(cache_file.read_bytes())
+    raise ValueError(f"Not a cache file: {cache_file}")
+
+
+def iter_cache_entries(cache_dir: Union[str, Path], skip_invalid: bool = False) -> Iterator[Tuple[Path, Dict]]:
+    """
+    Decode every cached week in cache_dir, whatever its age.
+
+    A week kept in several formats (a legacy JSON file next to its migrated
+    copy) is read once, from the non-JSON file.
+
+    Args:
+        cache_dir: Directory of cache files; other files are ignored
+        skip_invalid: Skip files that fail to decode instead of raising
+
+    Yields:
+        (cache file, entry with 'timestamp' and 'menu_items') in file name order
+    """
+    files = {}
+    for cache_file in cache_files(cache_dir):
+        if cache_file.stem not in files or files[cache_file.stem].suffix == JsonSerializer.suffix:
+            files[cache_file.stem] = cache_file
+    for cache_file in sorted(files.values()):
+        try:
+            entry = read_cache_file(cache_file)
+        except Exception:
+            if skip_invalid:
+                continue
+            raise
+        yield cache_file, entry
+
+
+# Mode of new cache files (what open() gives them under the usual 022 umask);
+# mkstemp's temp files are owner-only (0600)
+NEW_FILE_MODE = 0o644
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes):
+    """
+    Replace path with data so readers see either the old or the new file, never a partial one.
+
+    Writes a temp file in the same directory, fsyncs it and renames it over
+    path (os.replace is atomic on POSIX and Windows), then fsyncs the
+    directory so the rename survives a crash.
+    """
+    path = Path(path)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        # Keep the replaced file's permissions; new files get NEW_FILE_MODE
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE
+        os.chmod(temp_name, mode)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is running wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, shared between processes.
+
+    Uses flock on POSIX and msvcrt.locking on Windows; the lock is released
+    when the holder closes the file or exits, so a crashed process never
+    leaves it stuck. The lock file itself is left in place.
+    """
+
+    def __init__(self, path: Union[str, Path], poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the lock; False if timeout seconds pass first."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, 'a+b')
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                self._file = lock_file
+                return True
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    lock_file.close()
+                    return False
+                time.sleep(self.poll_interval)
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,290 @@
+"""
+Seeded synthetic menus for scale and load testing.
+
+MenuProfile is fitted from cached weeks: for each food category, its share of
+items, its name vocabulary and servings, how often its nutrition is missing,
+a log-normal model of its macros (with their correlations) and how its
+calories relate to macro energy (4P + 4C + 9F). MenuGenerator
+samples from a profile either fetch_menu-shaped item records (as lists or
+MenuTables) or Nutrislice-shaped weekly API responses. The same profile and
+seed always produce the same menus.
+"""
+
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from dining_optimizer import categorize
+from menu_cache import iter_cache_entries
+from menu_table import MenuTable
+
+MACRO_FIELDS = ('calories', 'protein', 'fat', 'carbs', 'sodium')
+
+# Fields sampled jointly; calories are derived from their energy (4P + 4C + 9F)
+SAMPLED_FIELDS = ('protein', 'fat', 'carbs', 'sodium')
+
+# Resampling rounds for foods outside the fitted limits before clipping them
+MAX_REJECTIONS = 10
+
+# Decimal places the Nutrislice API rounds each field to
+ROUNDING = {'calories': 0, 'protein': 0, 'fat': 1, 'carbs': 0, 'sodium': 0}
+
+# First day of generated weeks (a Sunday, like the API's weeks)
+DEFAULT_START = date(2026, 2, 8)
+
+
+class MenuProfile:
+    """Per-category statistics of real menus that synthetic menus are sampled from."""
+
+    def __init__(self, categories: Dict[str, Dict], items_per_day: float, repeat_rate: float,
+                 limits: Dict[str, float]):
+        """
+        Args:
+            categories: Category name -> {'weight', 'names', 'servings', 'missing', 'mean', 'cov',
+                        'energy_ratio'} where mean/cov describe log1p of SAMPLED_FIELDS and
+                        energy_ratio is [mean, std] of log(calories / (4P + 4C + 9F))
+            items_per_day: Average number of items on one day's menu
+            repeat_rate: Fraction of a week's items that repeat a food served earlier that week
+            limits: Largest value of each MACRO_FIELDS field seen; samples stay within them
+        """
+        self.categories = categories
+        self.items_per_day = items_per_day
+        self.repeat_rate = repeat_rate
+        self.limits = limits
+
+    @classmethod
+    def fit(cls, weeks: Sequence[MenuTable]) -> 'MenuProfile':
+        """Fit a profile to cached weeks (one MenuTable per dining hall, meal and week)."""
+        weeks = [week for week in weeks if len(week)]
+        if not weeks:
+            raise ValueError("Cannot fit a menu profile without menu items")
+        menu = MenuTable.concat(weeks)
+        records = menu.to_records()
+        categories = [categorize(item.get('name', ''), item.get('protein', 0), item.get('carbs', 0),
+                                 item.get('calories', 0))
+                      for item in records]
+        values = {field: np.nan_to_num(menu.column(field)) for field in MACRO_FIELDS}
+        all_macros = np.log1p(np.stack([values[field] for field in SAMPLED_FIELDS], axis=1))
+        energy = 4 * values['protein'] + 4 * values['carbs'] + 9 * values['fat']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            all_ratios = np.log(values['calories'] / energy)
+        has_ratio = (values['calories'] > 0) & (energy > 0)
+        limits = {field: float(column.max()) for field, column in values.items()}
+
+        profile = {}
+        for category in sorted(set(categories)):
+            rows = [index for index, candidate in enumerate(categories) if candidate == category]
+            members = [records[index] for index in rows]
+            missing = np.array([not item.get('calories') and not item.get('protein') for item in members])
+            macros = all_macros[rows][~missing]
+            if len(macros) < 2:
+                # Too few items for a covariance: borrow the whole menu's
+                macros = all_macros
+            ratios = all_ratios[rows][has_ratio[rows]]
+            if len(ratios) < 2:
+                ratios = all_ratios[has_ratio]
+            profile[category] = {
+                'weight': len(rows) / len(records),
+                'names': sorted({item['name'] for item in members if item.get('name')}),
+                'servings': [item.get('serving', '') for item in members],
+                'missing': float(missing.mean()),
+                'mean': macros.mean(axis=0).tolist(),
+                # A small ridge keeps the covariance positive definite
+                'cov': (np.cov(macros, rowvar=False) + np.eye(len(SAMPLED_FIELDS)) * 1e-3).tolist(),
+                # Median and MAD: a few mislabeled foods would otherwise widen the spread
+                'energy_ratio': [float(np.median(ratios)),
+                                 float(1.4826 * np.median(np.abs(ratios - np.median(ratios))))],
+            }
+
+        # Day structure comes from weeks that carry per-item dates
+        days = 0
+        dated_items = 0
+        repeats = 0
+        for week in weeks:
+            dates = [day for day in week.unique_values('date') if day]
+            if len(dates) > 1:
+                days += len(dates)
+                dated_items += len(week)
+                repeats += len(week) - len(week.first_occurrences(['name', 'serving']))
+        items_per_day = dated_items / days if days else len(menu) / len(weeks) / 7
+        repeat_rate = repeats / dated_items if dated_items else 0.0
+        return cls(profile, items_per_day, repeat_rate, limits)
+
+    @classmethod
+    def from_cache(cls, cache_dir: Union[str, Path] = '.cache') -> 'MenuProfile':
+        """Fit a profile to every cache file in cache_dir, whatever its age."""
+        weeks = [entry['menu_items'] for _, entry in iter_cache_entries(cache_dir)]
+        return cls.fit(weeks)
+
+
+class MenuGenerator:
+    """Samples synthetic foods, weekly menus and API responses from a MenuProfile."""
+
+    def __init__(self, profile: MenuProfile, seed: int = 0):
+        """
+        Args:
+            profile: Fitted statistics to sample from (see MenuProfile.from_cache)
+            seed: Seed for every random choice; equal seeds give equal output
+        """
+        self.profile = profile
+        self.rng = np.random.default_rng(seed)
+        self._category_names = list(profile.categories)
+        self._category_weights = np.array([profile.categories[name]['weight'] for name in self._category_names])
+        self._category_weights /= self._category_weights.sum()
+
+    def foods(self, count: int) -> List[Dict]:
+        """
+        count synthetic foods: name, macros and serving, without date or dining hall.
+
+        Names recombine the words of real names in the same category, so most
+        still hit the category keywords and the rest fall back to nutrition rules.
+        Calories follow from the sampled protein, carbs and fat, so foods keep
+        real menus' energy balance, and no field exceeds the fitted limits.
+        """
+        categories = self.rng.choice(len(self._category_names), size=count, p=self._category_weights)
+        foods = [None] * count
+        for code in np.unique(categories).tolist():
+            stats = self.profile.categories[self._category_names[code]]
+            rows = np.flatnonzero(categories == code)
+            macros = self._macros(stats, len(rows))
+            missing = self.rng.random(len(rows)) < stats['missing']
+            for position, row in enumerate(rows.tolist()):
+                food = {'name': self._name(stats['names'])}
+                for field in MACRO_FIELDS:
+                    food[field] = 0 if missing[position] else round(macros[field][position], ROUNDING[field])
+                food['serving'] = stats['servings'][self.rng.integers(len(stats['servings']))]
+                foods[row] = food
+        return foods
+
+    def _macros(self, stats: Dict, count: int) -> Dict[str, np.ndarray]:
+        # Log-normal macros, resampling draws beyond the fitted limits
+        limits = np.array([self.profile.limits[field] for field in SAMPLED_FIELDS])
+        sampled = np.expm1(self.rng.multivariate_normal(stats['mean'], stats['cov'], size=count))
+        for _ in range(MAX_REJECTIONS):
+            outside = np.flatnonzero((sampled > limits).any(axis=1))
+            if not len(outside):
+                break
+            sampled[outside] = np.expm1(self.rng.multivariate_normal(stats['mean'], stats['cov'], size=len(outside)))
+        sampled = np.clip(sampled, 0.0, limits)
+        macros = dict(zip(SAMPLED_FIELDS, sampled.T))
+
+        energy = 4 * macros['protein'] + 4 * macros['carbs'] + 9 * macros['fat']
+        ratio_mean, ratio_std = stats['energy_ratio']
+        calories = energy * np.exp(self.rng.normal(ratio_mean, ratio_std, size=count))
+        macros['calories'] = np.minimum(calories, self.profile.limits['calories'])
+        return macros
+
+    def _name(self, names: List[str]) -> str:
+        # Leading words of one real name + last word of another
+        first = names[self.rng.integers(len(names))].split()
+        last = names[self.rng.integers(len(names))].split()
+        if len(first) < 2 or self.rng.random() < 0.3:
+            return ' '.join(first)
+        return ' '.join(first[:-1] + last[-1:])
+
+    def week(self, dining_hall: str = 'West Village', start: date = DEFAULT_START,
+             items_per_day: Optional[int] = None) -> List[Dict]:
+        """
+        One week of fetch_menu-shaped item records, day by day.
+
+        Like real weeks, a fitted share of items repeats foods served on
+        earlier days.
+        """
+        if items_per_day is None:
+            items_per_day = max(1, round(self.profile.items_per_day))
+        total = items_per_day * 7
+        repeats = int(round(total * self.profile.repeat_rate))
+        foods = self.foods(total - repeats)
+        # Repeats (None) reuse a food served earlier; the first day is all new foods
+        later = foods[items_per_day:] + [None] * repeats
+        order = foods[:items_per_day] + [later[index] for index in self.rng.permutation(len(later))]
+
+        items = []
+        served = []
+        for position, food in enumerate(order):
+            day = start + timedelta(days=position // items_per_day)
+            if food is None:
+                food = served[self.rng.integers(len(served))] if served else self.foods(1)[0]
+            served.append(food)
+            items.append({**food, 'dining_hall': dining_hall, 'date': day.isoformat()})
+        return items
+
+    def weeks(self, dining_halls: Sequence[str] = ('West Village', 'North Ave Dining Hall'),
+              start: date = DEFAULT_START, items_per_day: Optional[int] = None) -> Iterator[List[Dict]]:
+        """Endless consecutive weeks, one per dining hall in turn."""
+        week_start = start
+        while True:
+            for dining_hall in dining_halls:
+                yield self.week(dining_hall, week_start, items_per_day)
+            week_start += timedelta(weeks=1)
+
+    def menu(self, size: int, dining_halls: Sequence[str] = ('West Village', 'North Ave Dining Hall'),
+             start: date = DEFAULT_START) -> MenuTable:
+        """A MenuTable of exactly size items spanning as many halls and weeks as needed."""
+        items = []
+        for week in self.weeks(dining_halls, start):
+            if len(items) >= size:
+                break
+            items.extend(week)
+        return MenuTable.from_records(items[:size])
+
+    def payload(self, dining_hall: str = 'West Village', start: date = DEFAULT_START,
+                items_per_day: Optional[int] = None) -> Dict:
+        """A Nutrislice-shaped weekly menu response for a synthetic week."""
+        return nutrislice_payload(self.week(dining_hall, start, items_per_day))
+
+
+def nutrislice_payload(items: Sequence[Dict]) -> Dict:
+    """
+    Nutrislice-shaped weekly response whose foods parse back into items.
+
+    Foods get the bulky fields real responses carry (ingredients, icons, full
+    nutrition) so payload sizes and parse times are representative.
+    """
+    by_date: Dict[str, List[Dict]] = {}
+    for item in items:
+        by_date.setdefault(item.get('date') or DEFAULT_START.isoformat(), []).append(item)
+
+    days = []
+    for day_date, day_items in sorted(by_date.items()):
+        menu_items = []
+        for position, item in enumerate(day_items):
+            amount, _, unit = item.get('serving', '').partition(' ')
+            if 'lb' in unit.lower():
+                # The parser reports pound servings as a quarter of the listed amount
+                try:
+                    amount = f"{float(amount) * 4:g}"
+                except ValueError:
+                    pass
+            menu_items.append({
+                'id': position,
+                'date': day_date,
+                'position': position,
+                'is_section_title': False,
+                'text': '',
+                'food': {
+                    'id': zlib.crc32(item['name'].encode('utf-8')) & 0xFFFFFF,
+                    'name': item['name'],
+                    'description': f"Freshly prepared {item['name'].lower()}",
+                    'ingredients': ', '.join([item['name']] * 6),
+                    'image_url': f"https://images.example.com/{position}.jpg",
+                    'has_nutrition_info': True,
+                    'rounded_nutrition_info': {
+                        'calories': item.get('calories'), 'g_protein': item.get('protein'),
+                        'g_fat': item.get('fat'), 'g_carbs': item.get('carbs'),
+                        'mg_sodium': item.get('sodium'), 'g_fiber': None, 'g_sugar': None,
+                        'g_saturated_fat': None, 'g_trans_fat': None, 'mg_cholesterol': None,
+                        'mg_potassium': None, 'mg_calcium': None, 'mg_iron': None,
+                    },
+                    'serving_size_info': {'serving_size_amount': amount, 'serving_size_unit': unit},
+                    'icons': {'food_icons': [{'id': n, 'slug': f"icon-{n}", 'synced_name': 'Allergen'}
+                                             for n in range(4)]},
+                },
+            })
+        days.append({'date': day_date, 'has_unpublished_menus': False, 'menu_items': menu_items})
+
+    start_date = days[0]['date'] if days else DEFAULT_START.isoformat()
+    return {'start_date': start_date, 'menu_type_id': 1, 'days': days, 'last_updated': f"{start_date}T00:00:00"}
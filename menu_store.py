@@ -0,0 +1,235 @@
+"""
+SQLite menu store.
+
+An alternative to one cache file per week: every week's items live as rows
+in a single database, so filters ("items with >= 30g protein on Tuesday")
+run as indexed SQL queries instead of loading and scanning whole weeks.
+Foods are stored once in a catalog shared by every week (see food_catalog);
+items reference them by id.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from food_catalog import APPEARANCE_FIELDS, food_id, split_foods
+from menu_table import MenuTable
+
+# Item fields stored as columns, in MenuTable field order
+ITEM_FIELDS = ('name', 'calories', 'protein', 'fat', 'carbs', 'fiber', 'sodium', 'serving', 'dining_hall',
+               'date', 'category')
+
+# Item fields stored in the foods catalog; the rest are per appearance
+FOOD_FIELDS = tuple(field for field in ITEM_FIELDS if field not in APPEARANCE_FIELDS)
+
+# Bumped whenever the layout changes; older stores are rebuilt (they only cache the API)
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    cache_key TEXT PRIMARY KEY,
+    hall TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    week TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS foods (
+    food_id TEXT PRIMARY KEY,
+    name TEXT,
+    calories REAL,
+    protein REAL,
+    fat REAL,
+    carbs REAL,
+    fiber REAL,
+    sodium REAL,
+    serving TEXT,
+    category TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS items (
+    cache_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    hall TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    food_id TEXT NOT NULL,
+    dining_hall TEXT,
+    date TEXT,
+    -- Copied from foods so the filter index covers them
+    protein REAL,
+    calories REAL,
+    PRIMARY KEY (cache_key, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_filter ON items (date, hall, meal_type, protein, calories);
+CREATE INDEX IF NOT EXISTS items_food ON items (food_id);
+"""
+
+# SELECT list producing ITEM_FIELDS from items joined with foods
+_ITEM_COLUMNS = ', '.join(f"items.{field}" if field in APPEARANCE_FIELDS else f"foods.{field}"
+                          for field in ITEM_FIELDS)
+
+
+def _split_key(cache_key: str) -> Tuple[str, str, str]:
+    # Keys are f"{dining_hall}_{meal_type}_{monday}"; hall ids use '-', not '_'
+    hall, meal_type, week = cache_key.rsplit('_', 2)
+    return hall, meal_type, week
+
+
+class SqliteMenuStore:
+    """
+    Weekly menus in one SQLite database.
+
+    Entries have the same shape as a serializer's ({'timestamp', 'menu_items',
+    ...metadata}); each week is replaced in a single transaction, so readers
+    never see a partial week. Connections are per thread and the database
+    uses WAL mode, so readers don't block the writer.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            connection.executescript("DROP TABLE IF EXISTS items; DROP TABLE IF EXISTS foods; "
+                                     "DROP TABLE IF EXISTS weeks;")
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def save(self, cache_key: str, cache_data: Dict):
+        """Replace the stored week for cache_key."""
+        table = cache_data.get('menu_items', [])
+        if not isinstance(table, MenuTable):
+            table = MenuTable.from_records(table)
+        metadata = {key: value for key, value in cache_data.items() if key not in ('timestamp', 'menu_items')}
+        hall, meal_type, week = _split_key(cache_key)
+
+        foods, refs = split_foods(table)
+        food_ids = [food_id(food) for food in foods.to_records()]
+        food_rows = [(identifier,) + values
+                     for identifier, values in zip(food_ids, zip(*self._columns(foods, FOOD_FIELDS)))]
+        rows = [(cache_key, position, hall, meal_type, food_ids[ref]) + values
+                for position, (ref, values) in enumerate(zip(
+                    refs.tolist(), zip(*self._columns(table, APPEARANCE_FIELDS + ('protein', 'calories')))))]
+
+        connection = self._connection()
+        with connection:
+            replaced_foods = connection.execute("SELECT DISTINCT food_id FROM items WHERE cache_key = ?",
+                                                (cache_key,)).fetchall()
+            connection.execute("DELETE FROM items WHERE cache_key = ?", (cache_key,))
+            connection.execute("INSERT OR REPLACE INTO weeks VALUES (?, ?, ?, ?, ?, ?)",
+                               (cache_key, hall, meal_type, week, cache_data['timestamp'], json.dumps(metadata)))
+            connection.executemany(f"INSERT OR REPLACE INTO foods (food_id, {', '.join(FOOD_FIELDS)}) "
+                                   f"VALUES ({', '.join('?' * (1 + len(FOOD_FIELDS)))})", food_rows)
+            connection.executemany("INSERT INTO items (cache_key, position, hall, meal_type, food_id, "
+                                   f"{', '.join(APPEARANCE_FIELDS)}, protein, calories) "
+                                   f"VALUES ({', '.join('?' * (7 + len(APPEARANCE_FIELDS)))})", rows)
+            # Drop foods the old week referenced that no stored week serves any more
+            connection.executemany("DELETE FROM foods WHERE food_id = ? AND NOT EXISTS "
+                                   "(SELECT 1 FROM items WHERE items.food_id = foods.food_id)", replaced_foods)
+
+    @staticmethod
+    def _columns(table: MenuTable, fields: Sequence[str]) -> List[List]:
+        # SQL values per field, None where missing
+        columns = []
+        for field in fields:
+            if table.is_numeric(field):
+                columns.append([None if value != value else value for value in table.column(field).tolist()])
+            else:
+                columns.append(table.strings(field))
+        return columns
+
+    def load(self, cache_key: str) -> Optional[Dict]:
+        """The stored entry for cache_key, or None."""
+        cache_data = self.load_metadata(cache_key)
+        if cache_data is not None:
+            cache_data['menu_items'] = self.query([cache_key])
+        return cache_data
+
+    def load_metadata(self, cache_key: str) -> Optional[Dict]:
+        """The stored entry for cache_key without its items, or None."""
+        week = self._connection().execute("SELECT timestamp, metadata FROM weeks WHERE cache_key = ?",
+                                          (cache_key,)).fetchone()
+        if week is None:
+            return None
+        timestamp, metadata = week
+        cache_data = json.loads(metadata)
+        cache_data['timestamp'] = timestamp
+        return cache_data
+
+    def version(self, cache_key: str) -> Optional[str]:
+        """Timestamp of the stored week (changes on every save), or None if absent."""
+        return self.timestamps([cache_key]).get(cache_key)
+
+    def timestamps(self, cache_keys: Sequence[str]) -> Dict[str, str]:
+        """Timestamps of the stored weeks among cache_keys."""
+        if not cache_keys:
+            return {}
+        placeholders = ', '.join('?' * len(cache_keys))
+        return dict(self._connection().execute(
+            f"SELECT cache_key, timestamp FROM weeks WHERE cache_key IN ({placeholders})", list(cache_keys)))
+
+    def entries(self) -> List[Tuple[str, str]]:
+        """(cache_key, timestamp) of every stored week."""
+        return self._connection().execute("SELECT cache_key, timestamp FROM weeks ORDER BY cache_key").fetchall()
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM items")
+            connection.execute("DELETE FROM foods")
+            connection.execute("DELETE FROM weeks")
+
+    def query(self, cache_keys: Sequence[str], day: Optional[str] = None, min_protein: Optional[float] = None,
+              max_calories: Optional[float] = None, has_calories: bool = False) -> MenuTable:
+        """
+        Items of the given weeks that pass the filters, in week then menu order.
+
+        Args:
+            cache_keys: Weeks to search
+            day: Only items served on this date (YYYY-MM-DD)
+            min_protein: Only items with at least this much protein
+            max_calories: Only items with fewer calories than this
+            has_calories: Only items with a positive calorie count
+        """
+        conditions = []
+        filter_params = []
+        if min_protein is not None:
+            conditions.append("items.protein >= ?")
+            filter_params.append(min_protein)
+        if max_calories is not None:
+            conditions.append("items.calories < ?")
+            filter_params.append(max_calories)
+        if has_calories:
+            conditions.append("items.calories > 0")
+
+        connection = self._connection()
+        rows = []
+        for cache_key in cache_keys:
+            if day is None:
+                # Primary key range scan over one week
+                where, params = ["items.cache_key = ?"], [cache_key]
+            else:
+                # Leading columns of items_filter, then the protein range; the
+                # key keeps other weeks of the same hall and meal out
+                hall, meal_type, _ = _split_key(cache_key)
+                where = ["items.date = ?", "items.hall = ?", "items.meal_type = ?", "items.cache_key = ?"]
+                params = [day, hall, meal_type, cache_key]
+            rows.extend(connection.execute(
+                f"SELECT {_ITEM_COLUMNS} FROM items JOIN foods USING (food_id) "
+                f"WHERE {' AND '.join(where + conditions)} ORDER BY items.position", params + filter_params))
+
+        if not rows:
+            return MenuTable.empty()
+        columns = {field: values for field, values in zip(ITEM_FIELDS, zip(*rows))
+                   if any(value is not None for value in values)}
+        return MenuTable.from_columns(columns)
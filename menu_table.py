@@ -0,0 +1,293 @@
+"""
+Columnar storage for menu items.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class MenuTable:
+    """
+    Column-oriented menu: one NumPy array per field instead of one dict per item.
+
+    Numeric fields (calories, protein, ...) are float64 arrays with NaN for
+    missing values. Text fields (name, serving, dining_hall, date) are interned:
+    an int32 code array indexing into a list of unique strings, with -1 for
+    missing values.
+
+    The table also behaves like the List[Dict] it replaces - len(), iteration,
+    integer indexing and truthiness all work on per-item dict views - so
+    existing callers keep working while hot paths use the array columns.
+    """
+
+    def __init__(self, fields: List[str], numeric: Dict[str, np.ndarray],
+                 strings: Dict[str, Tuple[np.ndarray, List[str]]], length: int):
+        self.fields = fields
+        self._numeric = numeric
+        self._strings = strings
+        self._length = length
+        # Memoized runs() per text field; safe because tables are never modified in place
+        self._runs: Dict[str, Dict[str, List[Tuple[int, int]]]] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'MenuTable':
+        """Build a table from a list of item dicts."""
+        records = list(records)
+
+        # Column order follows first appearance so dict views keep their key order
+        fields = []
+        seen = set()
+        for record in records:
+            for key in record:
+                if key not in seen:
+                    seen.add(key)
+                    fields.append(key)
+
+        return cls.from_columns({field: [record.get(field) for record in records] for field in fields})
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence]) -> 'MenuTable':
+        """Build a table from equal-length value lists keyed by field (None = missing)."""
+        numeric = {}
+        strings = {}
+        length = 0
+        for field, values in columns.items():
+            length = len(values)
+            if all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+                   for value in values):
+                numeric[field] = np.array([np.nan if value is None else value for value in values],
+                                          dtype=np.float64)
+            else:
+                index = {}
+                codes = np.array([-1 if value is None else index.setdefault(str(value), len(index))
+                                  for value in values], dtype=np.int32)
+                strings[field] = (codes, list(index))
+
+        return cls(list(columns), numeric, strings, length)
+
+    @classmethod
+    def empty(cls) -> 'MenuTable':
+        return cls([], {}, {}, 0)
+
+    @classmethod
+    def concat(cls, tables: Iterable[Union['MenuTable', List[Dict]]]) -> 'MenuTable':
+        """Concatenate several tables (or item lists) into one."""
+        tables = [table if isinstance(table, MenuTable) else cls.from_records(table) for table in tables]
+        tables = [table for table in tables if len(table)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+
+        fields = []
+        for table in tables:
+            for field in table.fields:
+                if field not in fields:
+                    fields.append(field)
+
+        numeric = {}
+        strings = {}
+        for field in fields:
+            if any(field in table._strings for table in tables):
+                index = {}
+                parts = []
+                for table in tables:
+                    codes, values = table.string_column(field)
+                    remap = np.array([index.setdefault(value, len(index)) for value in values] + [-1],
+                                     dtype=np.int32)
+                    # code -1 (missing) maps to the trailing -1 entry
+                    parts.append(remap[codes])
+                strings[field] = (np.concatenate(parts), list(index))
+            else:
+                numeric[field] = np.concatenate([table.column(field) for table in tables])
+
+        return cls(fields, numeric, strings, sum(len(table) for table in tables))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_records())
+
+    def __getitem__(self, key):
+        """Integer index returns an item dict; slices, masks and index arrays return a sub-table."""
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError("MenuTable index out of range")
+            return self.row(int(key))
+        if isinstance(key, slice):
+            return self.take(np.arange(self._length)[key])
+        key = np.asarray(key)
+        if key.dtype == bool:
+            return self.take(np.flatnonzero(key))
+        return self.take(key)
+
+    def __repr__(self) -> str:
+        return f"MenuTable({self._length} items, fields={self.fields})"
+
+    def is_numeric(self, field: str) -> bool:
+        """Whether field is stored as a numeric column."""
+        return field in self._numeric
+
+    def column(self, field: str) -> np.ndarray:
+        """Numeric column as a float64 array (NaN where missing)."""
+        if field in self._numeric:
+            return self._numeric[field]
+        return np.full(self._length, np.nan)
+
+    def string_column(self, field: str) -> Tuple[np.ndarray, List[str]]:
+        """Interned text column as (codes, unique values); code -1 means missing."""
+        if field in self._strings:
+            return self._strings[field]
+        return np.full(self._length, -1, dtype=np.int32), []
+
+    def strings(self, field: str) -> List[Optional[str]]:
+        """Text column decoded to a list of Python strings."""
+        codes, values = self.string_column(field)
+        return [values[code] if code >= 0 else None for code in codes.tolist()]
+
+    def equals_mask(self, field: str, value: str) -> np.ndarray:
+        """Boolean mask of rows whose text field equals value."""
+        codes, values = self.string_column(field)
+        matches = [code for code, candidate in enumerate(values) if candidate == value]
+        return np.isin(codes, matches)
+
+    def unique_values(self, field: str) -> List[str]:
+        """Sorted distinct non-missing values of a text column."""
+        codes, values = self.string_column(field)
+        return sorted(values[code] for code in np.unique(codes[codes >= 0]).tolist())
+
+    def runs(self, field: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Row ranges [start, stop) holding each value of a text column, in row order.
+
+        Weekly menus are stored day by day, so runs('date') is a per-day offset
+        index: one range per day. Computed once per table unless primed from a
+        persisted index with set_runs.
+        """
+        if field not in self._runs:
+            codes, values = self.string_column(field)
+            boundaries = (np.flatnonzero(np.diff(codes)) + 1).tolist()
+            runs: Dict[str, List[Tuple[int, int]]] = {}
+            if self._length:
+                for start, stop in zip([0] + boundaries, boundaries + [self._length]):
+                    code = int(codes[start])
+                    if code >= 0:
+                        runs.setdefault(values[code], []).append((start, stop))
+            self._runs[field] = runs
+        return self._runs[field]
+
+    def set_runs(self, field: str, runs: Dict[str, Sequence[Sequence[int]]]):
+        """Prime runs(field) with a previously computed (e.g. persisted) index."""
+        self._runs[field] = {value: [(int(start), int(stop)) for start, stop in ranges]
+                             for value, ranges in runs.items()}
+
+    def where_equals(self, field: str, value: str) -> 'MenuTable':
+        """Sub-table of the rows whose text field equals value, located through runs()."""
+        ranges = self.runs(field).get(value, [])
+        if len(ranges) == 1:
+            start, stop = ranges[0]
+            return self.take(np.arange(start, stop))
+        return self.take(np.concatenate([np.arange(start, stop) for start, stop in ranges])
+                         if ranges else np.arange(0))
+
+    def first_occurrences(self, fields: Sequence[str]) -> np.ndarray:
+        """Sorted row indexes of the first row for each distinct combination of text fields."""
+        if not self._length:
+            return np.arange(0)
+        keys = np.stack([self.string_column(field)[0] for field in fields], axis=1)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return np.sort(first)
+
+    def factorize(self, fields: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Group rows that are identical over fields (text or numeric).
+
+        Returns (first, inverse): first[g] is the first row of group g, with
+        groups numbered in order of first appearance, and inverse[i] is the
+        group of row i, so take(first).take(inverse) restores those fields.
+        """
+        if not self._length:
+            return np.arange(0), np.arange(0)
+        keys = []
+        for field in fields:
+            if field in self._numeric:
+                # Compare bit patterns, with every NaN (missing) made identical
+                column = self._numeric[field]
+                keys.append(np.where(np.isnan(column), np.nan, column).view(np.int64))
+            else:
+                keys.append(self.string_column(field)[0].astype(np.int64))
+        _, first, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return first[order], rank[inverse.reshape(-1)]
+
+    def take(self, indices: Union[Sequence[int], np.ndarray]) -> 'MenuTable':
+        """Sub-table with the given rows, in the given order."""
+        indices = np.asarray(indices, dtype=np.intp)
+        numeric = {field: column[indices] for field, column in self._numeric.items()}
+        strings = {field: (codes[indices], values) for field, (codes, values) in self._strings.items()}
+        return MenuTable(list(self.fields), numeric, strings, len(indices))
+
+    def with_column(self, field: str, values: np.ndarray) -> 'MenuTable':
+        """Copy of the table with a numeric column added or replaced."""
+        numeric = dict(self._numeric)
+        numeric[field] = np.asarray(values, dtype=np.float64)
+        strings = {name: column for name, column in self._strings.items() if name != field}
+        fields = self.fields if field in self.fields else self.fields + [field]
+        return MenuTable(list(fields), numeric, strings, self._length)
+
+    def with_string_column(self, field: str, values: Sequence[Optional[str]]) -> 'MenuTable':
+        """Copy of the table with a text column added or replaced."""
+        index = {}
+        codes = np.array([-1 if value is None else index.setdefault(value, len(index)) for value in values],
+                         dtype=np.int32)
+        strings = dict(self._strings)
+        strings[field] = (codes, list(index))
+        numeric = {name: column for name, column in self._numeric.items() if name != field}
+        fields = self.fields if field in self.fields else self.fields + [field]
+        return MenuTable(list(fields), numeric, strings, self._length)
+
+    def row(self, index: int) -> Dict:
+        """Dict view of a single item."""
+        item = {}
+        for field in self.fields:
+            if field in self._numeric:
+                value = self._numeric[field][index]
+                if value == value:  # NaN marks a missing value
+                    item[field] = float(value)
+            else:
+                codes, values = self._strings[field]
+                code = codes[index]
+                if code >= 0:
+                    item[field] = values[code]
+        return item
+
+    def rows(self, indices: Iterable[int]) -> List[Dict]:
+        """Dict views of several items."""
+        return self.take(np.fromiter(indices, dtype=np.intp)).to_records()
+
+    def to_records(self) -> List[Dict]:
+        """Materialize every item as a dict (the pre-MenuTable representation)."""
+        columns = []
+        for field in self.fields:
+            if field in self._numeric:
+                columns.append((field, True, self._numeric[field].tolist()))
+            else:
+                codes, values = self._strings[field]
+                columns.append((field, False, [values[code] if code >= 0 else None
+                                               for code in codes.tolist()]))
+
+        records = [{} for _ in range(self._length)]
+        for field, is_numeric, values in columns:
+            for record, value in zip(records, values):
+                if is_numeric:
+                    if value == value:
+                        record[field] = value
+                elif value is not None:
+                    record[field] = value
+        return records
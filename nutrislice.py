@@ -0,0 +1,178 @@
+"""
+Extraction of menu items from Nutrislice weekly menu responses.
+
+Two paths produce the same item records:
+- extract_menu_items walks an already-parsed response (response.json())
+- iter_menu_items parses the response byte stream incrementally, decoding
+  one days[] entry at a time and yielding compact records as it goes, so the
+  whole week never has to be buffered or held as one nested dict tree
+"""
+
+import codecs
+import json
+from typing import Dict, Iterable, Iterator, List
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def menu_item_record(food: Dict, day_date: str, dining_hall_name: str) -> Dict:
+    """Build the compact item record for one Nutrislice food entry."""
+    serving_size_info = food.get('serving_size_info', {})
+    nutrition = food.get('rounded_nutrition_info', {})
+
+    # Fix serving size for pounds (1 lb serving = 0.25 lbs actual)
+    amount = serving_size_info.get('serving_size_amount', '')
+    unit = serving_size_info.get('serving_size_unit', '')
+
+    if unit and 'lb' in unit.lower() and amount:
+        try:
+            amount_float = float(amount)
+            amount = str(amount_float * 0.25)
+        except (ValueError, TypeError):
+            pass
+
+    serving_str = f"{amount} {unit}".strip()
+
+    return {
+        'name': food.get('name', 'Unknown'),
+        'calories': nutrition.get('calories', 0) or 0,
+        'protein': nutrition.get('g_protein', 0) or 0,
+        'fat': nutrition.get('g_fat', 0) or 0,
+        'carbs': nutrition.get('g_carbs', 0) or 0,
+        'sodium': nutrition.get('mg_sodium', 0) or 0,
+        'serving': serving_str,
+        'dining_hall': dining_hall_name,
+        'date': day_date  # Add date to each item
+    }
+
+
+def _day_records(day: Dict, dining_hall_name: str) -> Iterator[Dict]:
+    day_date = day.get('date', '')  # Get the date for this day
+    for item in day.get('menu_items', []):
+        food = item.get('food', {})
+
+        # Parse nutritional info
+        if food is not None:
+            yield menu_item_record(food, day_date, dining_hall_name)
+
+
+def extract_menu_items(data: Dict, dining_hall_name: str) -> List[Dict]:
+    """Extract item records from a fully parsed weekly response."""
+    menu_items = []
+    for day in data.get('days', []):
+        menu_items.extend(_day_records(day, dining_hall_name))
+    return menu_items
+
+
+class _StreamReader:
+    """Rolling text buffer over a byte stream that decodes one JSON value at a time."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+        self._last_size = 0
+
+    def _read(self, size: int = 1) -> bool:
+        """Append at least size more characters (fewer at end of stream); False if none were added."""
+        if self.eof or size <= 0:
+            return False
+        pieces, count = [], 0
+        for chunk in self._chunks:
+            piece = self._decoder.decode(chunk)
+            pieces.append(piece)
+            count += len(piece)
+            if count >= size:
+                break
+        else:
+            pieces.append(self._decoder.decode(b'', final=True))
+            self.eof = True
+        # One join per call keeps growth linear even for tiny network chunks
+        added = ''.join(pieces)
+        self.text += added
+        return bool(added)
+
+    def _compact(self):
+        # Drop consumed text so the buffer only ever holds about one day
+        if self.pos > 65536:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character (empty string at end of stream)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self._read() and self.eof:
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of Nutrislice response")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more data until it is complete."""
+        self.peek()
+        self._compact()
+        # Sibling values (days of a week) are similar in size, so buffer about
+        # as much as the last one took before the first decode attempt
+        self._read(self._last_size - (len(self.text) - self.pos))
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                # Probably truncated: at least double the buffered tail before
+                # retrying so each value is re-scanned only O(log n) times
+                if not self._read(len(self.text) - self.pos + 1) and self.eof:
+                    value, end = _decoder.raw_decode(self.text, self.pos)
+                else:
+                    continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.text) and not self.eof and isinstance(value, (int, float)):
+                self._read()
+                continue
+            self._last_size = end - self.pos
+            self.pos = end
+            return value
+
+
+def iter_menu_items(chunks: Iterable[bytes], dining_hall_name: str) -> Iterator[Dict]:
+    """
+    Stream item records out of a weekly response body.
+
+    Only the top-level 'days' array is walked; each day is decoded, reduced to
+    item records and released before the next one is read, and anything after
+    the array is never read.
+    """
+    reader = _StreamReader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'days':
+            reader.expect('[')
+            if reader.peek() == ']':
+                return
+            while True:
+                yield from _day_records(reader.value(), dining_hall_name)
+                if reader.peek() == ',':
+                    reader.pos += 1
+                    continue
+                reader.expect(']')
+                return
+
+        reader.value()  # skip values of other top-level keys
+        if reader.peek() == ',':
+            reader.pos += 1
+            continue
+        reader.expect('}')
+        return
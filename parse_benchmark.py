@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Compare buffered (response.json()) and streaming parsing of a Nutrislice weekly response"""
+
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from menu_cache import read_cache_file
+from menu_generator import nutrislice_payload
+from nutrislice import extract_menu_items, iter_menu_items
+
+CHUNK_SIZE = 65536
+
+
+def build_payload(cache_file: Path, copies: int = 1) -> bytes:
+    """
+    Rebuild a Nutrislice-shaped weekly response from a cached week.
+
+    copies repeats each day's items to simulate larger menus.
+    """
+    items = read_cache_file(cache_file)['menu_items'].to_records()
+    return json.dumps(nutrislice_payload(items * copies)).encode('utf-8')
+
+
+def chunked(payload: bytes):
+    for start in range(0, len(payload), CHUNK_SIZE):
+        yield payload[start:start + CHUNK_SIZE]
+
+
+def measure(parse, payload: bytes, repeats: int = 5):
+    """Return (result, best seconds, peak traced bytes)."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = parse(payload)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def buffered(payload: bytes):
+    # What response.json() does: join the whole body, decode, parse the full tree
+    body = b''.join(chunked(payload))
+    return extract_menu_items(json.loads(body.decode('utf-8')), 'West Village')
+
+
+def streaming(payload: bytes):
+    return list(iter_menu_items(chunked(payload), 'West Village'))
+
+
+def main():
+    cache_file = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('.cache/west-village_dinner_2026-02-09.json')
+    print(f"{'menu size':>10} {'payload':>9} | {'buffered':>20} | {'streaming':>20}")
+    print("-" * 68)
+    for copies in (1, 4, 16):
+        payload = build_payload(cache_file, copies)
+        expected, buffered_time, buffered_peak = measure(buffered, payload)
+        result, streaming_time, streaming_peak = measure(streaming, payload)
+        assert result == expected, "streaming and buffered parsers disagree"
+        print(f"{len(result):>10} {len(payload) / 1e6:>7.1f}MB | "
+              f"{buffered_time * 1000:>7.1f}ms {buffered_peak / 1e6:>8.1f}MB | "
+              f"{streaming_time * 1000:>7.1f}ms {streaming_peak / 1e6:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Background cache warming for upcoming weeks.
+
+Menus are cached per (dining hall, meal type, Monday), so the first request
+of every week is a cold API fetch. PrefetchScheduler fetches every hall x meal
+for the current and upcoming weeks ahead of time, either once (e.g. from cron
+via `python dining_optimizer.py prefetch`) or periodically on a daemon thread.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class PrefetchScheduler:
+    def __init__(self, optimizer, meal_types: Sequence[str] = ("lunch", "dinner"),
+                 weeks: int = 2, interval: float = 6 * 3600, max_workers: int = 4,
+                 verbose: bool = False):
+        """
+        Args:
+            optimizer: DiningHallOptimizer whose cache is warmed
+            meal_types: Meal types to warm for every dining hall
+            weeks: Number of weeks to warm, starting with the current one
+            interval: Seconds between runs on the background thread; entries
+                      that would expire before the next run are refreshed early
+            max_workers: Maximum number of concurrent API requests
+            verbose: Print a report after every background run
+        """
+        self.optimizer = optimizer
+        self.meal_types = list(meal_types)
+        self.weeks = weeks
+        self.interval = interval
+        self.max_workers = max_workers
+        self.verbose = verbose
+        self.last_report: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def targets(self, now: Optional[datetime] = None) -> List[Tuple[str, str, datetime]]:
+        """(dining_hall, meal_type, date) for every menu to keep warm, one date per week."""
+        if now is None:
+            now = datetime.now()
+        monday = now - timedelta(days=now.weekday())
+        return [(dining_hall, meal_type, max(now, monday + timedelta(weeks=week)))
+                for week in range(self.weeks)
+                for dining_hall in self.optimizer.dining_halls
+                for meal_type in self.meal_types]
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Warm every target that is missing or expires before the next run.
+
+        Returns a report: {'started', 'seconds', 'entries'} where each entry has
+        dining_hall, meal_type, week, status ('fresh', 'warmed' or 'failed'),
+        items and seconds.
+        """
+        if now is None:
+            now = datetime.now()
+        started = time.perf_counter()
+        refresh_before = now + timedelta(seconds=self.interval)
+
+        entries = []
+        stale = []
+        for dining_hall, meal_type, date in self.targets(now):
+            entry = {'dining_hall': dining_hall, 'meal_type': meal_type,
+                     'week': (date - timedelta(days=date.weekday())).strftime('%Y-%m-%d'), 'status': 'fresh',
+                     'items': None, 'seconds': 0.0}
+            entries.append(entry)
+            expires = self.optimizer.cached_until(dining_hall, meal_type, date)
+            if expires is None or expires <= refresh_before:
+                entry['status'] = 'failed'  # until _warm sees the entry renewed
+                stale.append((entry, date, expires))
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale)),
+                                    thread_name_prefix='menu-prefetch') as pool:
+                for entry, date, expires in stale:
+                    pool.submit(self._warm, entry, date, expires)
+
+        self.last_report = {'started': now.isoformat(), 'seconds': time.perf_counter() - started,
+                            'entries': entries}
+        return self.last_report
+
+    def _warm(self, entry: Dict, date: datetime, expires: Optional[datetime]):
+        start = time.perf_counter()
+        menu_items = self.optimizer.refresh_menu(entry['dining_hall'], entry['meal_type'], date)
+        # A failed fetch leaves the cache entry (and its expiry) untouched
+        renewed = self.optimizer.cached_until(entry['dining_hall'], entry['meal_type'], date)
+        if renewed is not None and (expires is None or renewed > expires):
+            entry['status'] = 'warmed'
+            entry['items'] = len(menu_items)
+        entry['seconds'] = time.perf_counter() - start
+
+    def start(self) -> threading.Thread:
+        """Run run_once now and then every interval seconds on a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='menu-prefetch-scheduler', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread after its current run."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                report = self.run_once()
+                if self.verbose:
+                    print(format_report(report))
+            except Exception as e:
+                print(f"Prefetch run failed: {e}")
+            self._stop.wait(self.interval)
+
+
+def format_report(report: Dict) -> str:
+    """Render a run_once report as a short table."""
+    entries = report['entries']
+    counts = {status: sum(entry['status'] == status for entry in entries)
+              for status in ('warmed', 'fresh', 'failed')}
+    lines = [f"Prefetch at {report['started'][:19]}: {counts['warmed']} warmed, "
+             f"{counts['fresh']} already fresh, {counts['failed']} failed in {report['seconds']:.2f}s"]
+    for entry in entries:
+        items = '' if entry['items'] is None else f"{entry['items']} items"
+        seconds = f"{entry['seconds']:.2f}s" if entry['status'] != 'fresh' else ''
+        lines.append(f"  {entry['dining_hall']:<24} {entry['meal_type']:<7} {entry['week']}  "
+                     f"{entry['status']:<7} {items:>10} {seconds:>7}")
+    return "\n".join(lines)
@@ -0,0 +1,261 @@
+"""
+Profiling for scripted, non-interactive optimizer runs.
+
+`python dining_optimizer.py profile` runs a fixed scenario (fetch the menus of
+some halls for one meal, rank the top items and search for meals meeting
+protein / calorie goals) under cProfile or a sampling profiler. It prints the
+hottest functions and writes a collapsed-stack file ("frame;frame;frame
+count" per line) that flamegraph.pl, speedscope or inferno render directly:
+
+    python dining_optimizer.py profile --halls west-village --meal lunch --protein-goal 40
+    flamegraph.pl profile.folded > profile.svg
+"""
+
+import cProfile
+import io
+import pstats
+import subprocess
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from instrumentation import traced
+from menu_table import MenuTable
+
+# Maps the cProfile sort keys offered on the command line onto sample statistics
+SAMPLE_SORT_KEYS = {'cumulative': 'total', 'tottime': 'self'}
+
+# Call-graph paths under this many seconds are folded into their caller
+MIN_PATH_TIME = 1e-6
+
+# Every @traced function runs through this one wrapper code object
+_TRACED_WRAPPER = traced('')(lambda: None).__code__
+_TRACED_WRAPPER_KEY = (_TRACED_WRAPPER.co_filename, _TRACED_WRAPPER.co_firstlineno, _TRACED_WRAPPER.co_name)
+
+
+def run_scenario(optimizer, dining_halls: Sequence[str], meal_type: str, protein_goal: float,
+                 calorie_limit: float, exact: bool = False, top_n: int = 10) -> Dict[str, int]:
+    """
+    One scripted CLI session: fetch, show the top items, then search and display meals.
+
+    Args:
+        optimizer: DiningHallOptimizer to run the session on
+        dining_halls: Dining hall ids to load
+        meal_type: Meal type to load
+        protein_goal: Minimum protein per meal in grams
+        calorie_limit: Maximum calories per meal
+        exact: Search with the exact solver instead of the templates
+        top_n: Number of top items to show
+
+    Returns:
+        {'items': menu items loaded, 'combinations': meals found}
+    """
+    menus = optimizer.fetch_menus(list(dining_halls), [meal_type], verbose=False)
+    all_items = MenuTable.concat(menus.values())
+    # The scenario times the printing too, but keeps it out of the report
+    with redirect_stdout(io.StringIO()):
+        optimizer.show_top_items(all_items, top_n=top_n)
+        search = optimizer.find_optimal_combinations if exact else optimizer.find_combinations
+        combinations = search(all_items, protein_goal, calorie_limit)
+        optimizer.display_results(combinations)
+    return {'items': len(all_items), 'combinations': len(combinations)}
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every other thread at a fixed interval (wall clock)."""
+
+    def __init__(self, interval: float = 0.001):
+        """
+        Args:
+            interval: Seconds between samples; in practice at least the
+                      interpreter's switch interval (sys.getswitchinterval())
+                      while another thread holds the GIL
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SamplingProfiler':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    # A traced function's own frame follows its wrapper's
+                    if code is not _TRACED_WRAPPER:
+                        stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> Counter:
+        """Sample counts per 'thread;outermost;...;innermost' stack."""
+        return Counter({';'.join(stack): count for stack, count in self.samples.items()})
+
+    def report(self, sort: str = 'cumulative', limit: int = 30) -> str:
+        """The limit hottest functions by inclusive ('cumulative') or self ('tottime') samples."""
+        total = sum(self.samples.values())
+        if not total:
+            return "No samples taken (is the scenario shorter than the sampling interval?)"
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self.samples.items():
+            # stack[0] is the thread name
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                inclusive[function] += count
+        key = SAMPLE_SORT_KEYS[sort]
+        ranking = inclusive if key == 'total' else own
+        rows = sorted(inclusive, key=ranking.__getitem__, reverse=True)
+        lines = [f"{total} samples every {self.interval * 1000:g}ms, sorted by {key} samples", "",
+                 f"{'self':>7} {'self%':>6} {'total':>7} {'total%':>6}  function"]
+        for function in rows[:limit]:
+            lines.append(f"{own[function]:>7} {own[function] / total:>6.1%} "
+                         f"{inclusive[function]:>7} {inclusive[function] / total:>6.1%}  {function}")
+        return "\n".join(lines)
+
+
+def cprofile_report(profile: cProfile.Profile, sort: str = 'cumulative', limit: int = 30) -> str:
+    """pstats' table of the limit hottest functions."""
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue().strip()
+
+
+def collapsed_from_stats(stats: pstats.Stats) -> Counter:
+    """
+    Approximate collapsed stacks (microseconds per stack) from cProfile's call graph.
+
+    cProfile only records caller -> callee edges, so a function's time is
+    split across its callers in proportion to the time each edge accounts
+    for; recursive edges are dropped. All @traced functions share one
+    wrapper entry, which is left out of the stacks: its callers lead straight
+    to the traced functions, split in the same proportions.
+    """
+    entries = stats.stats
+    callees: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[3]))
+
+    folded: Counter = Counter()
+
+    def visit(function: Tuple, path: Tuple, functions: frozenset, share: float):
+        _, _, own_time, cumulative, _ = entries[function]
+        scale = share / cumulative if cumulative else 0.0
+        if function != _TRACED_WRAPPER_KEY:
+            path = path + (_label(*function),)
+        self_time = own_time * scale
+        for callee, edge_time in callees.get(function, ()):
+            child_share = edge_time * scale
+            if callee in functions:
+                continue
+            if child_share < MIN_PATH_TIME:
+                self_time += child_share
+            else:
+                # Nested traced calls pass through the wrapper again; that is not recursion
+                visit(callee, path, functions if callee == _TRACED_WRAPPER_KEY else functions | {callee},
+                      child_share)
+        microseconds = round(self_time * 1e6)
+        if microseconds:
+            folded[';'.join(path)] += microseconds
+
+    for function, entry in entries.items():
+        if not entry[4]:
+            visit(function, (), frozenset({function}), entry[3])
+    return folded
+
+
+def profile_call(function: Callable, profiler: str = 'cprofile', interval: float = 0.001,
+                 sort: str = 'cumulative', limit: int = 30) -> Tuple[object, str, Counter, Optional[pstats.Stats]]:
+    """
+    Run function under profiler ('cprofile' or 'sampling').
+
+    cProfile is deterministic but only sees the calling thread and slows
+    Python-heavy code down; the sampling profiler sees every thread,
+    including the fetch pool, at a fixed, small cost. cProfile's report
+    lumps every @traced call into one 'wrapper' row, and its collapsed
+    stacks can only estimate which caller reached which traced function;
+    the sampling profiler's stacks are exact.
+
+    Args:
+        function: Callable to run without arguments
+        profiler: 'cprofile' or 'sampling'
+        interval: Seconds between samples of the sampling profiler
+        sort: 'cumulative' or 'tottime' (self) ordering of the report
+        limit: Number of functions in the report
+
+    Returns:
+        (function's result, hot-function report, collapsed stacks, pstats.Stats or None)
+    """
+    if profiler == 'sampling':
+        sampler = SamplingProfiler(interval)
+        with sampler:
+            result = function()
+        return result, sampler.report(sort, limit), sampler.collapsed(), None
+    profile = cProfile.Profile()
+    result = profile.runcall(function)
+    stats = pstats.Stats(profile)
+    return result, cprofile_report(profile, sort, limit), collapsed_from_stats(stats), stats
+
+
+def write_collapsed(folded: Counter, path: Path):
+    """Write collapsed stacks, one 'frame;frame;frame count' line per stack."""
+    Path(path).write_text(''.join(f"{stack} {count}\n" for stack, count in sorted(folded.items())))
+
+
+def _label(filename: str, lineno: int, name: str) -> str:
+    # Built-ins have no source file ('~' in cProfile)
+    if filename == '~':
+        return name
+    return f"{name} ({Path(filename).name}:{lineno})"
+
+
+@contextmanager
+def stub_process(cache_dir: Path) -> Iterator[str]:
+    """
+    Serve synthetic menus fitted to cache_dir from a stub_server.py subprocess.
+
+    A separate process keeps the server's threads out of the profile.
+
+    Yields:
+        The stub's base URL
+    """
+    process = subprocess.Popen([sys.executable, '-u', str(Path(__file__).with_name('stub_server.py')),
+                                '--port', '0', '--cache-dir', str(cache_dir)],
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        # First line: "Serving synthetic menus at <base URL>"
+        line = process.stdout.readline().split()
+        if not line:
+            raise RuntimeError(f"Stub server exited with status {process.wait()}")
+        yield line[-1]
+    finally:
+        process.terminate()
+        process.wait()
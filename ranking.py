@@ -0,0 +1,77 @@
+"""
+Bounded top-K selection for ranking paths.
+
+Everything here ranks descending by a primary key, then a secondary key,
+with remaining ties going to whichever row arrived first - the same order a
+stable full sort would give, without sorting (or keeping) every candidate.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def top_k_indices(k: int, primary: np.ndarray, secondary: Optional[np.ndarray] = None,
+                  tiebreak: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indexes of the k best rows, best first, in O(n + k log k).
+
+    Args:
+        k: Number of rows to select
+        primary: Main ranking key (higher is better)
+        secondary: Optional second key for rows with equal primary (higher is better)
+        tiebreak: Optional arrival order for remaining ties (lower wins);
+                  defaults to row position
+    """
+    n = len(primary)
+    if k <= 0 or n == 0:
+        return np.arange(0)
+
+    if n > k:
+        # Partition on the primary key; everything tied with the k-th best
+        # primary value stays in play so ties are resolved exactly
+        threshold = np.partition(primary, n - k)[n - k]
+        candidates = np.flatnonzero(primary >= threshold)
+    else:
+        candidates = np.arange(n)
+
+    keys = [-primary[candidates]]
+    if secondary is not None:
+        keys.insert(0, -secondary[candidates])
+    if tiebreak is not None:
+        keys.insert(0, tiebreak[candidates])
+    # np.lexsort is stable and sorts by its last key first
+    return candidates[np.lexsort(keys)][:k]
+
+
+class TopK:
+    """
+    Streaming top-K over batches of rows.
+
+    Each push merges the batch with the rows kept so far and keeps only the
+    best k, so memory stays O(k + batch) however many candidates stream past.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.seen = 0
+        self._kept: Optional[Dict[str, np.ndarray]] = None
+
+    def push(self, primary: np.ndarray, secondary: np.ndarray, **columns: np.ndarray):
+        """Offer a batch of rows; columns are payload arrays aligned with the keys."""
+        batch = dict(columns)
+        batch['_primary'] = primary
+        batch['_secondary'] = secondary
+        batch['_arrival'] = np.arange(self.seen, self.seen + len(primary))
+        self.seen += len(primary)
+
+        if self._kept is not None:
+            batch = {key: np.concatenate([self._kept[key], batch[key]]) for key in batch}
+        keep = top_k_indices(self.k, batch['_primary'], batch['_secondary'], batch['_arrival'])
+        self._kept = {key: values[keep] for key, values in batch.items()}
+
+    def result(self) -> Dict[str, np.ndarray]:
+        """Payload columns of the kept rows, best first."""
+        if self._kept is None:
+            return {}
+        return {key: values for key, values in self._kept.items() if not key.startswith('_')}
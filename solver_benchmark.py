@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Compare the template heuristic (find_combinations) with the exact solver (find_optimal_combinations)"""
+
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+from dining_optimizer import DiningHallOptimizer
+from menu_cache import iter_cache_entries
+from menu_table import MenuTable
+
+SCENARIOS = [
+    # (protein goal, calorie limit)
+    (20, 300),
+    (30, 500),
+    (40, 600),
+    (50, 800),
+    (60, 900),
+]
+
+
+def load_fixtures(cache_dir: Path) -> MenuTable:
+    """Load every cached week in cache_dir (ignoring age) into one table."""
+    return MenuTable.concat([entry['menu_items'] for _, entry in iter_cache_entries(cache_dir)])
+
+
+def timed(function, *args, **kwargs):
+    """Run quietly and return (result, seconds)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def distinct_meals(combos):
+    """
+    Meals of a result list that are distinct: repeats of an earlier meal and
+    meals containing another listed meal (the same meal plus a filler) are dropped.
+    Portions of one food with different servings count as different items.
+    """
+    name_sets = [frozenset((item['name'], item.get('serving'), item['calories']) for item in items)
+                 for items, _, _ in combos]
+    distinct = []
+    for position, names in enumerate(name_sets):
+        if names in name_sets[:position]:
+            continue
+        if any(other < names for other in name_sets):
+            continue
+        distinct.append(combos[position])
+    return distinct
+
+
+def summarize(combos):
+    """Best and mean protein efficiency of a result list's distinct meals, and their count."""
+    combos = distinct_meals(combos)
+    if not combos:
+        return 0.0, 0.0, 0
+    efficiencies = [total_protein / max(total_calories, 1) for _, total_protein, total_calories in combos]
+    return efficiencies[0], sum(efficiencies) / len(efficiencies), len(combos)
+
+
+def main():
+    cache_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".cache")
+    menu = load_fixtures(cache_dir)
+    optimizer = DiningHallOptimizer(cache_dir=cache_dir)
+    print(f"Loaded {len(menu)} items from {cache_dir}\n")
+
+    print(f"{'goal':>5} {'limit':>6} | {'heuristic':>26} | {'optimal':>26}")
+    print(f"{'':>5} {'':>6} | {'time':>7} {'best':>6} {'mean':>6} {'n':>4} | {'time':>7} {'best':>6} {'mean':>6} {'n':>4}")
+    print("-" * 72)
+    for protein_goal, calorie_limit in SCENARIOS:
+        heuristic, heuristic_time = timed(optimizer.find_combinations, menu, protein_goal, calorie_limit)
+        optimal, optimal_time = timed(optimizer.find_optimal_combinations, menu, protein_goal, calorie_limit)
+        heuristic_best, heuristic_mean, heuristic_count = summarize(heuristic)
+        optimal_best, optimal_mean, optimal_count = summarize(optimal)
+        print(f"{protein_goal:>5} {calorie_limit:>6} | "
+              f"{heuristic_time * 1000:>5.0f}ms {heuristic_best:>6.3f} {heuristic_mean:>6.3f} {heuristic_count:>4} | "
+              f"{optimal_time * 1000:>5.0f}ms {optimal_best:>6.3f} {optimal_mean:>6.3f} {optimal_count:>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Nutrislice weekly menu API.
+
+Serves /menu/api/weeks/school/<hall>/menu-type/<meal>/<y>/<m>/<d>/ from
+recorded cache files or synthetic menus (menu_generator), with configurable
+latency, jitter, error injection and ETag / Last-Modified revalidation, so
+the fetch path can be measured and load-tested offline:
+
+    python stub_server.py --port 8765 --latency 0.2 --jitter 0.05 --error-rate 0.05
+    python dining_optimizer.py --base-url http://127.0.0.1:8765/menu/api/weeks/school
+
+or in-process:
+
+    with NutrisliceStub(latency=0.1) as stub:
+        optimizer = DiningHallOptimizer(base_url=stub.base_url)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from menu_cache import iter_cache_entries
+from menu_generator import MenuGenerator, MenuProfile, nutrislice_payload
+
+API_ROOT = '/menu/api/weeks/school'
+MENU_PATH = re.compile(rf'^{API_ROOT}/([\w-]+)/menu-type/([\w-]+)/(\d{{4}})/(\d{{1,2}})/(\d{{1,2}})/?$')
+
+# Display names the real API's responses are parsed with (see DiningHallOptimizer.dining_halls)
+HALL_NAMES = {'west-village': 'West Village', 'north-ave-dining-hall': 'North Ave Dining Hall'}
+
+
+def _week_start(day: date) -> date:
+    # Nutrislice weeks run Sunday to Saturday
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+class RecordedMenus:
+    """Weeks rebuilt from cache files, re-dated onto whichever week is requested."""
+
+    def __init__(self, cache_dir: Union[str, Path] = '.cache'):
+        self.weeks: Dict[Tuple[str, str], List[Dict]] = {}
+        for cache_file, entry in iter_cache_entries(cache_dir):
+            match = re.match(r'^(.+)_([^_]+)_\d{4}-\d{2}-\d{2}$', cache_file.stem)
+            if match:
+                self.weeks.setdefault((match.group(1), match.group(2)), entry['menu_items'].to_records())
+
+    def __call__(self, dining_hall: str, meal_type: str, week_start: date) -> Optional[Dict]:
+        items = self.weeks.get((dining_hall, meal_type))
+        if items is None:
+            return None
+        # Keep each item's weekday; undated items go on the Monday
+        dates = sorted({item['date'] for item in items if item.get('date')})
+        first = date.fromisoformat(dates[0]) if dates else None
+        shifted = []
+        for item in items:
+            offset = (date.fromisoformat(item['date']) - first).days if item.get('date') else 1
+            shifted.append({**item, 'date': (week_start + timedelta(days=offset % 7)).isoformat()})
+        return nutrislice_payload(shifted)
+
+
+class SyntheticMenus:
+    """Generated weeks, the same for every request of the same hall, meal and week."""
+
+    def __init__(self, profile: MenuProfile, seed: int = 0, items_per_day: Optional[int] = None,
+                 dining_halls: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            profile: Statistics menus are sampled from
+            seed: Base seed, combined with hall, meal and week
+            items_per_day: Items per day (default: the profile's)
+            dining_halls: Hall id -> display name of the halls served (default: HALL_NAMES)
+        """
+        self.profile = profile
+        self.seed = seed
+        self.items_per_day = items_per_day
+        self.dining_halls = HALL_NAMES if dining_halls is None else dining_halls
+
+    def __call__(self, dining_hall: str, meal_type: str, week_start: date) -> Optional[Dict]:
+        if dining_hall not in self.dining_halls:
+            return None
+        key = f"{self.seed}/{dining_hall}/{meal_type}/{week_start}".encode('utf-8')
+        generator = MenuGenerator(self.profile, seed=int.from_bytes(hashlib.sha256(key).digest()[:8], 'little'))
+        return generator.payload(self.dining_halls[dining_hall], week_start, self.items_per_day)
+
+
+class NutrisliceStub:
+    """
+    Threaded HTTP server answering weekly menu requests.
+
+    Every response is delayed by latency ± jitter seconds. With probability
+    error_rate a request gets one of error_statuses instead of the menu.
+    Menus carry an ETag and Last-Modified; conditional requests that match
+    get 304 Not Modified. Unknown halls/meals get 404.
+    """
+
+    def __init__(self, menus=None, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_statuses: Sequence[int] = (503,),
+                 seed: int = 0):
+        """
+        Args:
+            menus: Callable (dining_hall, meal_type, week_start) -> payload dict or None,
+                   e.g. RecordedMenus or SyntheticMenus; defaults to synthetic menus
+                   fitted to .cache
+            host, port: Address to listen on; port 0 picks a free port
+            latency: Seconds added before every response
+            jitter: Maximum random deviation from latency, in seconds
+            error_rate: Fraction of requests answered with an error status
+            error_statuses: Statuses injected errors are drawn from
+            seed: Seed for jitter and error injection
+        """
+        self.menus = menus if menus is not None else SyntheticMenus(MenuProfile.from_cache())
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.stats = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._responses: Dict[Tuple[str, str, date], Tuple[bytes, str, str]] = {}
+        self._modified = format_datetime(datetime.now(timezone.utc).replace(microsecond=0), usegmt=True)
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Value for DiningHallOptimizer(base_url=...)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_ROOT}"
+
+    def start(self) -> 'NutrisliceStub':
+        """Serve on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name='nutrislice-stub', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self) -> 'NutrisliceStub':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def invalidate(self, dining_hall: Optional[str] = None):
+        """Change served weeks (new ETag and Last-Modified), as if the menus were republished."""
+        with self._lock:
+            # Last-Modified has one-second resolution, so always move it forward by at least that
+            modified = max(datetime.now(timezone.utc).replace(microsecond=0),
+                           parsedate_to_datetime(self._modified) + timedelta(seconds=1))
+            self._modified = format_datetime(modified, usegmt=True)
+            for key in list(self._responses):
+                if dining_hall is None or key[0] == dining_hall:
+                    del self._responses[key]
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _inject_error(self) -> Optional[int]:
+        with self._lock:
+            if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                return self._rng.choice(self.error_statuses)
+        return None
+
+    def _response(self, dining_hall: str, meal_type: str, week_start: date) -> Optional[Tuple[bytes, str, str]]:
+        """(body, etag, last_modified) of a week, built once and reused until invalidated."""
+        key = (dining_hall, meal_type, week_start)
+        with self._lock:
+            response = self._responses.get(key)
+            modified = self._modified
+        if response is None:
+            payload = self.menus(dining_hall, meal_type, week_start)
+            if payload is None:
+                return None
+            body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            etag = f'"{hashlib.sha1(body + modified.encode()).hexdigest()[:16]}"'
+            response = (body, etag, modified)
+            with self._lock:
+                response = self._responses.setdefault(key, response)
+        return response
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        stub: NutrisliceStub = self.server.stub
+        time.sleep(stub._delay())
+        with stub._lock:
+            stub.stats['requests'] += 1
+
+        error = stub._inject_error()
+        if error is not None:
+            return self._send(error, json.dumps({'error': 'injected'}).encode('utf-8'))
+
+        match = MENU_PATH.match(self.path.split('?', 1)[0])
+        if not match:
+            return self._send(404, b'{"error": "not found"}')
+        dining_hall, meal_type, year, month, day = match.groups()
+        try:
+            requested = date(int(year), int(month), int(day))
+        except ValueError:
+            return self._send(404, b'{"error": "bad date"}')
+        response = stub._response(dining_hall, meal_type, _week_start(requested))
+        if response is None:
+            return self._send(404, b'{"error": "unknown menu"}')
+
+        body, etag, last_modified = response
+        headers = {'ETag': etag, 'Last-Modified': last_modified, 'Cache-Control': 'max-age=0'}
+        if self._not_modified(etag, last_modified):
+            return self._send(304, b'', headers)
+        self._send(200, body, headers)
+
+    def _not_modified(self, etag: str, last_modified: str) -> bool:
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        stub: NutrisliceStub = self.server.stub
+        with stub._lock:
+            stub.stats[status] += 1
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet
+        pass
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve Nutrislice-shaped weekly menus locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--source", choices=["synthetic", "recorded"], default="synthetic",
+                        help="Generate menus or replay the cache files (re-dated to the requested week)")
+    parser.add_argument("--cache-dir", default=".cache", help="Cache files to replay or fit synthetic menus to")
+    parser.add_argument("--items-per-day", type=int, help="Synthetic items per day (default: fitted)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum ± deviation from --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=[503],
+                        help="Statuses injected failures use (default: 503)")
+    args = parser.parse_args(argv)
+
+    if args.source == "recorded":
+        menus = RecordedMenus(args.cache_dir)
+    else:
+        menus = SyntheticMenus(MenuProfile.from_cache(args.cache_dir), args.seed, args.items_per_day)
+    stub = NutrisliceStub(menus, args.host, args.port, args.latency, args.jitter, args.error_rate,
+                          args.error_statuses, args.seed)
+    print(f"Serving {args.source} menus at {stub.base_url}")
+    print(f"  NUTRISLICE_BASE_URL={stub.base_url} python dining_optimizer.py")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Requests: {dict(stub.stats)}")
+
+
+if __name__ == "__main__":
+    main()
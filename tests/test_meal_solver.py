@@ -0,0 +1,58 @@
+"""find_optimal_combinations returns distinct meals, none padded with filler."""
+
+import unittest
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+from dining_optimizer import DiningHallOptimizer
+from meal_solver import solve_top_k
+from solver_benchmark import SCENARIOS, load_fixtures
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / '.cache'
+
+
+class MealSolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.optimizer = DiningHallOptimizer(cache_dir=CACHE_DIR, memory_cache_size=0)
+        cls.menu = load_fixtures(CACHE_DIR)
+
+    def solve(self, protein_goal: float, calorie_limit: float) -> np.ndarray:
+        return solve_top_k(self.menu.column('calories'), self.menu.column('protein'),
+                           self.menu.string_column('name')[0], protein_goal, calorie_limit)[0]
+
+    def test_no_result_contains_another(self):
+        for protein_goal, calorie_limit in SCENARIOS:
+            meals = [frozenset(row[row >= 0].tolist()) for row in self.solve(protein_goal, calorie_limit)]
+            self.assertEqual(len(meals), len(set(meals)))
+            for meal in meals:
+                for other in meals:
+                    self.assertFalse(other < meal, (protein_goal, calorie_limit, sorted(meal), sorted(other)))
+
+    def test_every_item_is_needed(self):
+        protein = self.menu.column('protein')
+        calories = self.menu.column('calories')
+        for protein_goal, calorie_limit in SCENARIOS:
+            for row in self.solve(protein_goal, calorie_limit):
+                items = row[row >= 0].tolist()
+                for size in range(1, len(items)):
+                    for subset in combinations(items, size):
+                        self.assertFalse(protein[list(subset)].sum() >= protein_goal
+                                         and calories[list(subset)].sum() <= calorie_limit, items)
+
+    def test_results_meet_goal_and_limit(self):
+        for protein_goal, calorie_limit in SCENARIOS:
+            for _, total_protein, total_calories in self.optimizer.find_optimal_combinations(
+                    self.menu, protein_goal, calorie_limit):
+                self.assertGreaterEqual(total_protein, protein_goal)
+                self.assertLessEqual(total_calories, calorie_limit)
+
+    def test_rejects_empty_top_k(self):
+        with self.assertRaises(ValueError):
+            solve_top_k(np.array([100.0]), np.array([10.0]), np.array([0]), 5, 500, top_k=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""score_many must match calculate_meal_score exactly."""
+
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from dining_optimizer import DiningHallOptimizer
+from solver_benchmark import load_fixtures
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / '.cache'
+
+
+class ScoreManyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.optimizer = DiningHallOptimizer(cache_dir=CACHE_DIR, memory_cache_size=0)
+        cls.menu = load_fixtures(CACHE_DIR)
+        cls.items = cls.menu.to_records()
+
+    def random_combos(self, rng: np.random.Generator, count: int, width: int = 4) -> np.ndarray:
+        combos = rng.integers(len(self.menu), size=(count, width))
+        # Pad a random number of trailing slots (at least one item per combo)
+        sizes = rng.integers(1, width + 1, size=count)
+        combos[np.arange(width) >= sizes[:, None]] = -1
+        return combos
+
+    def test_matches_scalar_scores(self):
+        rng = np.random.default_rng(0)
+        for protein_goal, calorie_limit in [(30, 500), (15, 800), (50, 1200), (0, 10_000)]:
+            combos = self.random_combos(rng, 3000)
+            scores, details = self.optimizer.score_many(self.menu, combos, protein_goal, calorie_limit)
+            for row, combo in enumerate(combos.tolist()):
+                score, reasons = self.optimizer.calculate_meal_score(
+                    [self.items[index] for index in combo if index >= 0], protein_goal, calorie_limit)
+                self.assertEqual(scores[row], score, combo)
+                for key, values in details.items():
+                    self.assertEqual(values[row], reasons.get(key, 0), (combo, key))
+
+    def test_empty_combos(self):
+        for combos in (np.empty((0, 4), dtype=np.intp), []):
+            scores, details = self.optimizer.score_many(self.menu, combos, 30, 500)
+            self.assertEqual(scores.shape, (0,))
+            self.assertTrue(all(values.shape == (0,) for values in details.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()